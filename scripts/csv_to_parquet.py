@@ -0,0 +1,29 @@
+"""
+Convert the CSV files in the data directory to Parquet.
+DataService loads a Parquet file instead of its CSV when the Parquet copy
+is at least as new, so re-run this after editing any CSV.
+
+Usage: python scripts/csv_to_parquet.py [data_path]
+"""
+import os
+import sys
+
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.data_service import DATA_FILES, read_csv_table
+
+
+def main(data_path: str = "./data") -> None:
+    for name, model in DATA_FILES.items():
+        csv_path = os.path.join(data_path, f"{name}.csv")
+        parquet_path = os.path.join(data_path, f"{name}.parquet")
+        
+        table = read_csv_table(csv_path, model)
+        pq.write_table(table, parquet_path)
+        print(f"✅ {csv_path} -> {parquet_path} ({table.num_rows} rows)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "./data")
@@ -1,4 +1,5 @@
 # banking-dispute-assistant-v1 Agent
 from .intelligent_dispute_agent import IntelligentDisputeAgent
+from .batch_dispute_processor import BatchDisputeProcessor
 
-__all__ = ['IntelligentDisputeAgent']
\ No newline at end of file
+__all__ = ['IntelligentDisputeAgent', 'BatchDisputeProcessor']
\ No newline at end of file
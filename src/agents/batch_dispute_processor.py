@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models import DisputeRequest, DisputeResponse
+from .intelligent_dispute_agent import IntelligentDisputeAgent
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for a batch job before its disputes go online; matches the job's 24h completion window
+BATCH_MAX_WAIT = 24 * 3600.0
+
+
+class BatchDisputeProcessor:
+    """
+    Back-office dispute processing through the OpenAI Batch API.
+    The opening turn of each dispute is sent as one discounted batch job; the
+    remaining turns run online once the job finishes. Latency-sensitive flows
+    should keep calling IntelligentDisputeAgent.process_dispute directly.
+    """
+    
+    def __init__(self, agent: IntelligentDisputeAgent, batch_size: int = 100, poll_interval: float = 60.0,
+                 max_wait: float = BATCH_MAX_WAIT):
+        self.agent = agent
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._pending: List[DisputeRequest] = []
+    
+    @property
+    def pending(self) -> int:
+        """Number of disputes waiting for the next flush"""
+        return len(self._pending)
+    
+    def enqueue(self, dispute_request: DisputeRequest) -> None:
+        """Queue a dispute for the next batch"""
+        self._pending.append(dispute_request)
+    
+    async def flush(self) -> List[DisputeResponse]:
+        """Process every queued dispute, submitting one batch job per batch_size requests"""
+        requests, self._pending = self._pending, []
+        chunks = [requests[i:i + self.batch_size] for i in range(0, len(requests), self.batch_size)]
+        
+        chunk_responses = await asyncio.gather(*(self._process_chunk(chunk) for chunk in chunks))
+        return [response for responses in chunk_responses for response in responses]
+    
+    async def _process_chunk(self, requests: List[DisputeRequest]) -> List[DisputeResponse]:
+        """Run one batch job and continue each dispute from its batched opening turn"""
+        initial_turns = await self._run_initial_turns(requests)
+        return await self.agent.run_batch_async(requests, initial_turns=initial_turns)
+    
+    async def _run_initial_turns(self, requests: List[DisputeRequest]) -> List[Optional[Tuple[str, List[Dict], Any]]]:
+        """Get opening turns from the Batch API; disputes without one fall back to the online path"""
+        openai_service = self.agent.openai_service
+        
+        try:
+            batch_id = await openai_service.submit_dispute_batch(
+                [request.model_dump(mode="json", exclude_none=True) for request in requests],
+                self.agent.function_registry.get_function_schemas()
+            )
+            if batch_id is None:
+                return [None] * len(requests)
+            
+            deadline = time.monotonic() + self.max_wait
+            results = None
+            while results is None:
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        "Dispute batch %s not finished after %.0fs, processing %d disputes online",
+                        batch_id, self.max_wait, len(requests)
+                    )
+                    return [None] * len(requests)
+                await asyncio.sleep(self.poll_interval)
+                results = await openai_service.get_dispute_batch_results(batch_id)
+        except Exception as e:
+            logger.error("Dispute batch failed, processing %d disputes online: %s", len(requests), e)
+            return [None] * len(requests)
+        
+        return [results.get(str(index)) for index in range(len(requests))]
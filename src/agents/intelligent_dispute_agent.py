@@ -1,22 +1,88 @@
 import asyncio
 import logging
 import os
-import json
-from datetime import datetime
-from typing import Dict, List, Any, Optional
-import uuid
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import orjson
 
 from ..models import (
     DisputeRequest, DisputeResponse, DisputeStatus, 
     AgentStep, FunctionCall
 )
-from ..services.data_service import DataService
+from ..services._http import HTTP2_AVAILABLE
+from ..services.data_service import get_data_service
 from ..services.openai_service import OpenAIService
 from ..services.mock_api_service import MockAPIService
 from ..services.function_registry import FunctionRegistry
+from ..utils.helpers import generate_unique_id
 
 logger = logging.getLogger(__name__)
 
+# Status members bound once; enum attribute access goes through the metaclass
+_APPROVED = DisputeStatus.APPROVED
+_FILED = DisputeStatus.FILED
+_DENIED = DisputeStatus.DENIED
+_INVESTIGATING = DisputeStatus.INVESTIGATING
+_PENDING = DisputeStatus.PENDING
+
+# Next steps for processed and failed disputes; copied into each response
+DEFAULT_NEXT_STEPS = ("Review dispute documentation", "Monitor case status")
+ERROR_NEXT_STEPS = ("Manual review required", "Contact technical support")
+
+# Phrases in the final reasoning that set the confidence score, checked in order
+CONFIDENCE_MARKERS = (
+    ("high confidence", 0.9),
+    ("medium confidence", 0.7),
+    ("low confidence", 0.5),
+)
+
+
+def _apply_temporary_credit(data: Dict[str, Any], resolution_data: Dict[str, Any]) -> None:
+    """Record an issued temporary credit"""
+    if data.get("success"):
+        resolution_data["temporary_credit_issued"] = True
+        resolution_data["temporary_credit_amount"] = data.get("amount", 0.0)
+        resolution_data["customer_response"] = f"Your dispute has been processed and a temporary credit of ${data.get('amount', 0):.2f} has been issued to your account."
+
+
+def _apply_network_filing(data: Dict[str, Any], resolution_data: Dict[str, Any]) -> None:
+    """Record a dispute filed with the payment network"""
+    if data.get("success"):
+        resolution_data["customer_response"] = f"Your dispute has been filed with the payment network. Reference number: {data.get('reference_number', 'N/A')}"
+        resolution_data["estimated_resolution_days"] = 10
+
+
+def _apply_evidence(data: Dict[str, Any], resolution_data: Dict[str, Any]) -> None:
+    """Collect the analysis summary of an investigation as evidence"""
+    if "analysis" in data:
+        resolution_data["supporting_evidence"].append(data["analysis"])
+
+
+# Function results that shape the resolution, keyed by function name
+_RESULT_HANDLERS = {
+    "issue_temporary_credit": _apply_temporary_credit,
+    "file_dispute_with_network": _apply_network_filing,
+    "search_past_disputes": _apply_evidence,
+    "assess_merchant_risk": _apply_evidence,
+    "check_network_rules": _apply_evidence,
+}
+
+
+@dataclass(frozen=True)
+class DisputeContext:
+    """Request-scoped state for the dispute being processed"""
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    call_cache: Optional[Dict[Tuple, FunctionCall]] = field(default=None, compare=False)
+
+
+# Each dispute runs in its own task, so one agent can serve concurrent requests
+_dispute_context: ContextVar[DisputeContext] = ContextVar("dispute_context", default=DisputeContext())
+
 
 class IntelligentDisputeAgent:
     """
@@ -25,119 +91,158 @@ class IntelligentDisputeAgent:
     """
     
     def __init__(self, openai_api_key: Optional[str] = None):
-        self.data_service = DataService()
+        self.data_service = get_data_service()
         self.openai_service = OpenAIService(openai_api_key)
         self.mock_api_service = MockAPIService()
         self.function_registry = FunctionRegistry(self.data_service, self.mock_api_service)
+        self._function_schemas = self.function_registry.get_function_schemas()
         
         # Configuration
         self.max_conversation_turns = int(os.getenv("MAX_CONVERSATION_TURNS", "10"))
-        self._current_user_id: Optional[str] = None
-        self._current_session_id: Optional[str] = None
+        self.function_call_timeout = float(os.getenv("FUNCTION_CALL_TIMEOUT", "30"))
+        self.batch_concurrency = int(os.getenv("DISPUTE_BATCH_CONCURRENCY", "10"))
         
-    async def process_dispute(self, dispute_request: DisputeRequest) -> DisputeResponse:
+    async def process_dispute(self, dispute_request: DisputeRequest,
+                              initial_turn: Optional[Tuple[str, List[Dict], Any]] = None) -> DisputeResponse:
         """Main entry point for intelligent dispute processing"""
         
-        start_time = datetime.now()
+        # Store user and session context for the duration of this dispute
+        token = _dispute_context.set(DisputeContext(
+            user_id=dispute_request.user_id,
+            session_id=dispute_request.session_id,
+            call_cache={}
+        ))
+        try:
+            return await self._process_dispute(dispute_request, initial_turn)
+        finally:
+            _dispute_context.reset(token)
+    
+    async def run_batch_async(self, requests: List[DisputeRequest],
+                              max_concurrency: Optional[int] = None,
+                              initial_turns: Optional[List[Optional[Tuple[str, List[Dict], Any]]]] = None) -> List[DisputeResponse]:
+        """Process several disputes concurrently, returning responses in request order"""
+        if initial_turns is not None and len(initial_turns) != len(requests):
+            raise ValueError(f"Got {len(initial_turns)} initial turns for {len(requests)} requests")
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_concurrency)
+        
+        async def _process_one(request: DisputeRequest, initial_turn) -> DisputeResponse:
+            async with semaphore:
+                return await self.process_dispute(request, initial_turn)
         
-        # Store user and session context
-        self._current_user_id = dispute_request.user_id
-        self._current_session_id = dispute_request.session_id
+        # Over HTTP/2 the disputes multiplex on one connection, so open it
+        # first rather than letting each of them start its own handshake
+        if HTTP2_AVAILABLE and len(requests) > 1:
+            await self.openai_service.warm()
+        
+        initial_turns = initial_turns or [None] * len(requests)
+        return await asyncio.gather(*(
+            _process_one(request, initial_turn) for request, initial_turn in zip(requests, initial_turns)
+        ))
+    
+    async def _process_dispute(self, dispute_request: DisputeRequest,
+                               initial_turn: Optional[Tuple[str, List[Dict], Any]] = None) -> DisputeResponse:
+        """Run the function-calling conversation for a single dispute"""
+        
+        start_time = datetime.now()
+        start_perf = time.perf_counter()
         
         # Generate unique dispute ID
-        dispute_id = await self._generate_dispute_id()
+        dispute_id = self._generate_dispute_id()
         
         # Log dispute initiation
-        logger.info(
-            f"Starting intelligent dispute processing",
-            extra={
-                "user_id": dispute_request.user_id,
-                "session_id": dispute_request.session_id,
-                "customer_id": dispute_request.customer_id,
-                "dispute_id": dispute_id,
-                "dispute_category": dispute_request.dispute_category,
-                "transaction_amount": dispute_request.transaction_amount
-            }
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Starting intelligent dispute processing",
+                extra={
+                    "user_id": dispute_request.user_id,
+                    "session_id": dispute_request.session_id,
+                    "customer_id": dispute_request.customer_id,
+                    "dispute_id": dispute_id,
+                    "dispute_category": dispute_request.dispute_category,
+                    "transaction_amount": dispute_request.transaction_amount
+                }
+            )
+        
+        # Read-only lookups start while the model's response is still streaming
+        early_calls: Dict[str, asyncio.Task] = {}
+        preload = None
         
         try:
             # Initialize conversation with dispute request
-            dispute_dict = dispute_request.dict()
-            function_schemas = self.function_registry.get_function_schemas()
+            dispute_dict = dispute_request.model_dump(mode="json", exclude_none=True)
+            function_schemas = self._function_schemas
             
-            # Start intelligent conversation
-            messages = []
+            # Start intelligent conversation; follow-up turns resend the same
+            # system and user prompt so every request shares the cached prefix
+            messages = self.openai_service.create_initial_messages(dispute_dict)
             all_function_calls = []
             conversation_turns = 0
             final_reasoning = ""
             
-            # Initial LLM call
-            initial_response, function_calls, initial_message = await self.openai_service.process_dispute_with_functions(
-                dispute_dict, function_schemas
-            )
+            # Load the data files in a worker thread while the initial LLM call
+            # is in flight; the first round of function calls needs them
+            if not self.data_service.is_loaded:
+                preload = asyncio.get_running_loop().run_in_executor(None, self.data_service.preload)
+            
+            if initial_turn is None:
+                # Initial LLM call
+                initial_response, function_calls, initial_message = await self.openai_service.process_dispute_with_functions(
+                    dispute_dict, function_schemas, self._early_dispatcher(early_calls, conversation_turns)
+                )
+                self._cancel_unused_calls(early_calls, function_calls)
+            else:
+                # Opening turn already answered, e.g. by the Batch API
+                initial_response, function_calls, initial_message = initial_turn
+            
+            if preload is not None:
+                try:
+                    await preload
+                except Exception as e:
+                    logger.warning("Data preload failed, loading on demand: %s", e)
             
             # Add the complete assistant message to conversation history
-            assistant_message = {"role": "assistant", "content": initial_message.content}
-            if hasattr(initial_message, 'tool_calls') and initial_message.tool_calls:
-                assistant_message["tool_calls"] = [
-                    {
-                        "id": tc.id,
-                        "type": "function", 
-                        "function": {
-                            "name": tc.function.name,
-                            "arguments": tc.function.arguments
-                        }
-                    } for tc in initial_message.tool_calls
-                ]
-            messages.append(assistant_message)
+            messages.append(self._assistant_message(initial_message))
             
             # Process function calls and continue conversation
             while function_calls and conversation_turns < self.max_conversation_turns:
                 conversation_turns += 1
                 
-                logger.info(
-                    f"Processing {len(function_calls)} function calls in turn {conversation_turns}",
-                    extra={
-                        "user_id": dispute_request.user_id,
-                        "session_id": dispute_request.session_id,
-                        "dispute_id": dispute_id,
-                        "turn": conversation_turns,
-                        "functions": [fc["function_name"] for fc in function_calls]
-                    }
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "Processing %d function calls in turn %d",
+                        len(function_calls), conversation_turns,
+                        extra={
+                            "user_id": dispute_request.user_id,
+                            "session_id": dispute_request.session_id,
+                            "dispute_id": dispute_id,
+                            "turn": conversation_turns,
+                            "functions": [fc["function_name"] for fc in function_calls]
+                        }
+                    )
                 
                 # Execute all function calls
-                function_results = await self._execute_function_calls(function_calls)
+                function_results = await self._execute_function_calls(function_calls, early_calls)
                 all_function_calls.extend(function_results)
                 
                 # Add function results to conversation
-                for result in function_results:
-                    messages.append({
+                messages.extend(
+                    {
                         "role": "tool",
                         "tool_call_id": result.id,
-                        "content": json.dumps(result.result) if result.result else f"Error: {result.error}"
-                    })
+                        "content": self._tool_message_content(result)
+                    } for result in function_results
+                )
                 
                 # Continue conversation with results
                 next_response, next_function_calls, next_message = await self.openai_service.continue_conversation(
-                    messages, function_schemas
+                    messages, function_schemas, self._early_dispatcher(early_calls, conversation_turns)
                 )
+                self._cancel_unused_calls(early_calls, next_function_calls)
                 
                 if next_response or next_function_calls:
                     # Add the complete assistant message to conversation history
-                    assistant_message = {"role": "assistant", "content": next_message.content}
-                    if hasattr(next_message, 'tool_calls') and next_message.tool_calls:
-                        assistant_message["tool_calls"] = [
-                            {
-                                "id": tc.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tc.function.name,
-                                    "arguments": tc.function.arguments
-                                }
-                            } for tc in next_message.tool_calls
-                        ]
-                    messages.append(assistant_message)
+                    messages.append(self._assistant_message(next_message))
                     
                     if next_response:
                         final_reasoning = next_response
@@ -148,12 +253,15 @@ class IntelligentDisputeAgent:
             resolution_data = self._extract_resolution_data(final_reasoning, all_function_calls)
             
             # Create processing step
-            processing_step = AgentStep(
+            duration = time.perf_counter() - start_perf
+            # Both models are built from values the agent produced itself, so
+            # they skip validation; FunctionCall results were validated on creation
+            processing_step = AgentStep.model_construct(
                 step_name="intelligent_dispute_processing",
                 status="completed",
                 start_time=start_time,
-                end_time=datetime.now(),
-                duration=(datetime.now() - start_time).total_seconds(),
+                end_time=start_time + timedelta(seconds=duration),
+                duration=duration,
                 inputs=dispute_dict,
                 outputs=resolution_data,
                 confidence=resolution_data.get("confidence_score"),
@@ -162,13 +270,14 @@ class IntelligentDisputeAgent:
             )
             
             # Build final response
-            response = DisputeResponse(
+            response = DisputeResponse.model_construct(
                 dispute_id=dispute_id,
                 status=self._determine_status(resolution_data),
                 customer_response=resolution_data.get("customer_response", "Your dispute has been processed."),
                 back_office_notes=resolution_data.get("back_office_notes", {}),
                 temporary_credit_issued=resolution_data.get("temporary_credit_issued", False),
-                temporary_credit_amount=resolution_data.get("temporary_credit_amount", 0.0),
+                # Echoed back from the credit API, so normalise it like validation would
+                temporary_credit_amount=float(resolution_data.get("temporary_credit_amount", 0.0)),
                 estimated_resolution_days=resolution_data.get("estimated_resolution_days", 5),
                 confidence_score=resolution_data.get("confidence_score"),
                 next_steps=resolution_data.get("next_steps", []),
@@ -178,18 +287,19 @@ class IntelligentDisputeAgent:
                 reasoning=final_reasoning
             )
             
-            logger.info(
-                f"Dispute processing completed successfully",
-                extra={
-                    "user_id": dispute_request.user_id,
-                    "session_id": dispute_request.session_id,
-                    "dispute_id": dispute_id,
-                    "status": response.status.value,
-                    "function_calls_made": len(all_function_calls),
-                    "conversation_turns": conversation_turns,
-                    "processing_time": processing_step.duration
-                }
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Dispute processing completed successfully",
+                    extra={
+                        "user_id": dispute_request.user_id,
+                        "session_id": dispute_request.session_id,
+                        "dispute_id": dispute_id,
+                        "status": response.status.value,
+                        "function_calls_made": len(all_function_calls),
+                        "conversation_turns": conversation_turns,
+                        "processing_time": processing_step.duration
+                    }
+                )
             
             return response
             
@@ -204,79 +314,144 @@ class IntelligentDisputeAgent:
                 }
             )
             return self._create_error_response(dispute_request, dispute_id, str(e))
+        
+        finally:
+            # Early calls are only consumed on the normal path; don't leave them
+            # running when processing failed or was cancelled before using them
+            for task in early_calls.values():
+                task.cancel()
+            if preload is not None and not preload.done():
+                preload.cancel()
     
-    async def _execute_function_calls(self, function_calls: List[Dict]) -> List[FunctionCall]:
+    async def _execute_function_calls(self, function_calls: List[Dict],
+                                      early_calls: Optional[Dict[str, asyncio.Task]] = None) -> List[FunctionCall]:
         """Execute a list of function calls"""
-        results = []
+        early_calls = early_calls if early_calls is not None else {}
         
-        # Execute function calls in parallel when possible
-        tasks = []
-        for fc in function_calls:
-            task = self._execute_single_function_call(fc)
-            tasks.append(task)
+        # Parallel-safe calls run concurrently, each bounded by the call timeout;
+        # calls already started while the response streamed are reused
+        tasks: Dict[int, asyncio.Task] = {}
+        async with asyncio.TaskGroup() as tg:
+            for i, fc in enumerate(function_calls):
+                if fc["id"] in early_calls:
+                    tasks[i] = early_calls.pop(fc["id"])
+                elif self.function_registry.is_parallel_safe(fc["function_name"]):
+                    tasks[i] = tg.create_task(self._execute_with_timeout(fc))
         
-        # Wait for all function calls to complete
-        function_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Calls with side effects (credits, filings, notifications) then run one
+        # at a time in the order the model asked for them
+        return [
+            await tasks[i] if i in tasks else await self._execute_with_timeout(fc)
+            for i, fc in enumerate(function_calls)
+        ]
+    
+    def _early_dispatcher(self, early_calls: Dict[str, asyncio.Task],
+                          completed_turns: int) -> Optional[Callable[[Dict], None]]:
+        """Return a callback that starts read-only calls as they stream in, or None if no turn remains to use them"""
+        if completed_turns >= self.max_conversation_turns:
+            return None
         
-        # Process results
-        for i, result in enumerate(function_results):
-            fc = function_calls[i]
-            
-            if isinstance(result, Exception):
-                results.append(FunctionCall(
-                    id=fc["id"],
-                    function_name=fc["function_name"],
-                    arguments=fc["arguments"],
-                    error=str(result),
-                    execution_time=0.0
-                ))
-            else:
-                results.append(result)
+        def dispatch(function_call: Dict) -> None:
+            # Side-effecting calls wait for the complete response
+            if self.function_registry.is_cacheable(function_call["function_name"]):
+                early_calls[function_call["id"]] = asyncio.create_task(self._execute_with_timeout(function_call))
         
-        return results
+        return dispatch
     
-    async def _execute_single_function_call(self, function_call: Dict) -> FunctionCall:
-        """Execute a single function call"""
-        start_time = datetime.now()
-        
+    @staticmethod
+    def _cancel_unused_calls(early_calls: Dict[str, asyncio.Task], function_calls: List[Dict]) -> None:
+        """Cancel early calls the final response did not include, e.g. after a stream error"""
+        call_ids = {fc["id"] for fc in function_calls}
+        for call_id in [call_id for call_id in early_calls if call_id not in call_ids]:
+            early_calls.pop(call_id).cancel()
+    
+    async def _execute_with_timeout(self, function_call: Dict) -> FunctionCall:
+        """Execute a single function call, converting timeouts and failures into errors"""
         try:
-            logger.info(
-                f"Executing function: {function_call['function_name']}",
+            async with asyncio.timeout(self.function_call_timeout):
+                return await self._execute_single_function_call(function_call)
+        except TimeoutError:
+            error = f"Function timed out after {self.function_call_timeout}s"
+            context = _dispute_context.get()
+            logger.error(
+                "Function execution failed: %s - %s", function_call["function_name"], error,
                 extra={
-                    "user_id": self._current_user_id,
-                    "session_id": self._current_session_id,
+                    "user_id": context.user_id,
+                    "session_id": context.session_id,
                     "function": function_call["function_name"],
-                    "arguments": function_call["arguments"]
+                    "error": error
                 }
             )
+            return FunctionCall(
+                id=function_call["id"],
+                function_name=function_call["function_name"],
+                arguments=function_call["arguments"],
+                error=error,
+                execution_time=self.function_call_timeout
+            )
+        except Exception as e:
+            return FunctionCall(
+                id=function_call["id"],
+                function_name=function_call["function_name"],
+                arguments=function_call["arguments"],
+                error=str(e),
+                execution_time=0.0
+            )
+    
+    async def _execute_single_function_call(self, function_call: Dict) -> FunctionCall:
+        """Execute a single function call"""
+        start = time.perf_counter()
+        context = _dispute_context.get()
+        
+        cache_key = self._call_cache_key(function_call, context)
+        if cache_key is not None and cache_key in context.call_cache:
+            return context.call_cache[cache_key].model_copy(
+                update={"id": function_call["id"], "execution_time": 0.0}
+            )
+        
+        try:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Executing function: %s", function_call["function_name"],
+                    extra={
+                        "user_id": context.user_id,
+                        "session_id": context.session_id,
+                        "function": function_call["function_name"],
+                        "arguments": function_call["arguments"]
+                    }
+                )
             
             result = await self.function_registry.execute_function(
                 function_call["function_name"],
                 function_call["arguments"],
                 session_context={
-                    "user_id": self._current_user_id,
-                    "session_id": self._current_session_id
+                    "user_id": context.user_id,
+                    "session_id": context.session_id
                 }
             )
             
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start
             
-            return FunctionCall(
+            function_result = FunctionCall(
                 id=function_call["id"],
                 function_name=function_call["function_name"],
                 arguments=function_call["arguments"],
                 result=result,
                 execution_time=execution_time
             )
+            if cache_key is not None and result.get("success"):
+                context.call_cache[cache_key] = function_result
+            
+            return function_result
             
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start
             
             logger.error(
                 f"Function execution failed: {function_call['function_name']} - {str(e)}",
                 extra={
-                    "user_id": self._current_user_id,
-                    "session_id": self._current_session_id,
+                    "user_id": context.user_id,
+                    "session_id": context.session_id,
                     "function": function_call["function_name"],
                     "error": str(e)
                 }
@@ -290,6 +465,43 @@ class IntelligentDisputeAgent:
                 execution_time=execution_time
             )
     
+    def _call_cache_key(self, function_call: Dict, context: DisputeContext) -> Optional[Tuple]:
+        """Return the per-dispute cache key for a read-only call, or None if it is not cacheable"""
+        if context.call_cache is None or not self.function_registry.is_cacheable(function_call["function_name"]):
+            return None
+        
+        key = (function_call["function_name"], tuple(sorted(function_call["arguments"].items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    @staticmethod
+    def _assistant_message(message: Any) -> Dict[str, Any]:
+        """Convert an OpenAI assistant message into a conversation history entry"""
+        assistant_message = {"role": "assistant", "content": message.content}
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            assistant_message["tool_calls"] = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.function.name,
+                        "arguments": tc.function.arguments
+                    }
+                } for tc in tool_calls
+            ]
+        return assistant_message
+    
+    @staticmethod
+    def _tool_message_content(result: FunctionCall) -> str:
+        """Serialize a function result compactly for the conversation"""
+        if result.result:
+            return orjson.dumps(result.result).decode()
+        return f"Error: {result.error}"
+    
     def _extract_resolution_data(self, final_reasoning: str, function_calls: List[FunctionCall]) -> Dict[str, Any]:
         """Extract resolution data from LLM response and function call results"""
         
@@ -305,40 +517,23 @@ class IntelligentDisputeAgent:
             "temporary_credit_amount": 0.0,
             "estimated_resolution_days": 5,
             "confidence_score": 0.8,
-            "next_steps": ["Review dispute documentation", "Monitor case status"],
+            "next_steps": list(DEFAULT_NEXT_STEPS),
             "supporting_evidence": []
         }
         
         # Analyze function call results for specific actions taken
         for fc in function_calls:
             if fc.result and fc.result.get("success"):
-                data = fc.result.get("data", {})
-                
-                # Check for temporary credit issuance
-                if fc.function_name == "issue_temporary_credit":
-                    if data.get("success"):
-                        resolution_data["temporary_credit_issued"] = True
-                        resolution_data["temporary_credit_amount"] = data.get("amount", 0.0)
-                        resolution_data["customer_response"] = f"Your dispute has been processed and a temporary credit of ${data.get('amount', 0):.2f} has been issued to your account."
-                
-                # Check for dispute filing
-                elif fc.function_name == "file_dispute_with_network":
-                    if data.get("success"):
-                        resolution_data["customer_response"] = f"Your dispute has been filed with the payment network. Reference number: {data.get('reference_number', 'N/A')}"
-                        resolution_data["estimated_resolution_days"] = 10
-                
-                # Extract evidence from investigations
-                elif fc.function_name in ["search_past_disputes", "assess_merchant_risk", "check_network_rules"]:
-                    if "analysis" in data:
-                        resolution_data["supporting_evidence"].append(data["analysis"])
+                handler = _RESULT_HANDLERS.get(fc.function_name)
+                if handler:
+                    handler(fc.result.get("data", {}), resolution_data)
         
         # Extract confidence from reasoning text (simple heuristic)
-        if "high confidence" in final_reasoning.lower():
-            resolution_data["confidence_score"] = 0.9
-        elif "medium confidence" in final_reasoning.lower():
-            resolution_data["confidence_score"] = 0.7
-        elif "low confidence" in final_reasoning.lower():
-            resolution_data["confidence_score"] = 0.5
+        reasoning = final_reasoning.lower()
+        for marker, score in CONFIDENCE_MARKERS:
+            if marker in reasoning:
+                resolution_data["confidence_score"] = score
+                break
         
         return resolution_data
     
@@ -346,20 +541,21 @@ class IntelligentDisputeAgent:
         """Determine dispute status based on resolution data"""
         
         if resolution_data.get("temporary_credit_issued"):
-            return DisputeStatus.APPROVED
-        elif "filed with the payment network" in resolution_data.get("customer_response", ""):
-            return DisputeStatus.FILED
-        elif "denied" in resolution_data.get("customer_response", "").lower():
-            return DisputeStatus.DENIED
-        else:
-            return DisputeStatus.INVESTIGATING
+            return _APPROVED
+        
+        customer_response = resolution_data.get("customer_response", "")
+        if "filed with the payment network" in customer_response:
+            return _FILED
+        if "denied" in customer_response.lower():
+            return _DENIED
+        return _INVESTIGATING
     
     def _create_error_response(self, dispute_request: DisputeRequest, dispute_id: str, error_message: str) -> DisputeResponse:
         """Create an error response"""
         
         return DisputeResponse(
             dispute_id=dispute_id,
-            status=DisputeStatus.PENDING,
+            status=_PENDING,
             customer_response=f"We're experiencing technical difficulties processing your dispute. Please try again later. Error: {error_message}",
             back_office_notes={
                 "error": error_message,
@@ -370,15 +566,13 @@ class IntelligentDisputeAgent:
             temporary_credit_amount=0.0,
             estimated_resolution_days=1,
             confidence_score=0.0,
-            next_steps=["Manual review required", "Contact technical support"],
+            next_steps=list(ERROR_NEXT_STEPS),
             supporting_evidence=[],
             processing_steps=[],
             total_function_calls=0,
             reasoning=f"Error occurred: {error_message}"
         )
     
-    async def _generate_dispute_id(self) -> str:
+    def _generate_dispute_id(self) -> str:
         """Generate a unique dispute ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        return f"BDA{timestamp}{unique_id.upper()}"  # BDA = banking-dispute-assistant-v1
\ No newline at end of file
+        return generate_unique_id("BDA")  # BDA = banking-dispute-assistant-v1
\ No newline at end of file
@@ -0,0 +1,37 @@
+import asyncio
+import weakref
+from typing import Optional
+
+import httpx
+
+# HTTP/2 lets concurrent requests share one connection; httpx needs h2 for it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+HTTP_TIMEOUT = 30.0
+
+# Pooled connections cannot outlive the loop that opened them, and each
+# Streamlit session runs its disputes on its own loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the connection pool shared by all HTTP calls on the running loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the running loop's connection pool, if one was opened"""
+    client: Optional[httpx.AsyncClient] = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
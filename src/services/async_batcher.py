@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class AsyncBatcher:
+    """Coalesce payloads submitted within a short window into one bulk call"""
+
+    def __init__(self, single_fn: Callable[[Any], Awaitable[Any]],
+                 bulk_fn: Optional[Callable[[List[Any]], Awaitable[List[Any]]]] = None,
+                 max_batch: int = 32, max_wait: float = 0.025):
+        self.single_fn = single_fn
+        self.bulk_fn = bulk_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        # Pending batches are per event loop, since their futures belong to it
+        self._pending: Dict[asyncio.AbstractEventLoop, List[Tuple[Any, asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, payload: Any) -> Any:
+        """Queue a payload and wait for its result from the next flushed batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.setdefault(loop, [])
+        batch.append((payload, future))
+        if len(batch) >= self.max_batch:
+            self._start_flush(loop, batch)
+        elif len(batch) == 1:
+            loop.call_later(self.max_wait, self._start_flush, loop, batch)
+
+        return await future
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        # A timer for a batch that already flushed on size must not flush the next one
+        if self._pending.get(loop) is not batch:
+            return
+        del self._pending[loop]
+
+        task = loop.create_task(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        payloads = [payload for payload, _ in batch]
+        try:
+            if self.bulk_fn is not None:
+                results = await self.bulk_fn(payloads)
+            else:
+                results = await asyncio.gather(*(self.single_fn(p) for p in payloads), return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        # A short bulk response would otherwise leave the unmatched callers waiting forever
+        if len(results) < len(batch):
+            error = RuntimeError(f"Bulk call returned {len(results)} results for {len(batch)} payloads")
+            results = list(results) + [error] * (len(batch) - len(results))
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
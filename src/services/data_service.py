@@ -1,11 +1,145 @@
+import ast
+import copy
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import os
-from typing import List, Optional
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from pydantic import BaseModel, TypeAdapter
 from ..models import (
     Transaction, PastDispute, MerchantRisk, 
     NetworkRule, DisputePolicy
 )
 
+# Data files and the model each row is loaded into
+DATA_FILES: Dict[str, Type[BaseModel]] = {
+    "transactions": Transaction,
+    "past_disputes": PastDispute,
+    "merchant_risk": MerchantRisk,
+    "network_rules": NetworkRule,
+    "dispute_policies": DisputePolicy,
+}
+
+
+def read_csv_table(file_path: str, model: Type[BaseModel]) -> pa.Table:
+    """Read the model's columns from a CSV into an Arrow table, keeping its string fields as strings"""
+    # Without this, card_last_four "0775" would be inferred as the integer 775
+    # and dates would be parsed into date32 columns
+    column_types = {
+        name: pa.dictionary(pa.int32(), pa.string()) if name in CATEGORICAL_COLUMNS else pa.string()
+        for name, field in model.model_fields.items()
+        if field.annotation is str
+    }
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        include_columns=list(model.model_fields),
+    )
+    return pa_csv.read_csv(file_path, convert_options=convert_options)
+
+# Network rule type used for each dispute category
+CATEGORY_MAP = {
+    "Fraud": "Fraud",
+    "Billing Error": "Processing Error",
+    "Authorization Issue": "Authorization",
+}
+
+# Low-cardinality columns loaded as dictionary-encoded (pandas categorical) columns
+CATEGORICAL_COLUMNS = frozenset({"merchant_name", "customer_id", "category", "rule_type"})
+
+# Dollar amounts quoted in a network rule's description, e.g. "$500" or "$1,250.00"
+AMOUNT_PATTERN = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)")
+
+# Maximum number of query results kept per DataService instance
+QUERY_CACHE_SIZE = 1024
+
+
+def _cached_query(method):
+    """Cache a query's result per instance, keyed on its arguments"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            result = self._query_cache[key]
+        except KeyError:
+            result = method(self, *args, **kwargs)
+            # Lists are stored as tuples so callers can't change the cached copy
+            if isinstance(result, list):
+                result = tuple(result)
+            if len(self._query_cache) >= QUERY_CACHE_SIZE:
+                self._query_cache.pop(next(iter(self._query_cache)), None)
+            self._query_cache[key] = result
+        if isinstance(result, tuple):
+            return list(result)
+        # Dicts, e.g. the transaction stats, are copied for the same reason
+        if isinstance(result, dict):
+            return copy.deepcopy(result)
+        return result
+    return wrapper
+
+
+def _load_once(frame_attr: str):
+    """Run a loader under its own lock, so concurrent first callers wait for one parse"""
+    def decorator(method):
+        lock_name = f"{frame_attr}_lock"
+        
+        @functools.wraps(method)
+        def wrapper(self):
+            # Once loaded, a frame is only replaced by clear_cache, so no lock is needed
+            df = getattr(self, frame_attr)
+            if df is not None:
+                return df
+            # The loader re-checks its frame, so waiters return the one just loaded
+            with getattr(self, lock_name):
+                return method(self)
+        return wrapper
+    return decorator
+
+
+@functools.cache
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter that validates a whole list of rows for the model in one call"""
+    return TypeAdapter(List[model])
+
+
+def _validate_rows(model: Type[BaseModel], df: pd.DataFrame) -> None:
+    """Validate every row against the model so malformed data fails at load, not per query"""
+    _list_adapter(model).validate_python(df[list(model.model_fields)].to_dict(orient="records"))
+
+
+def _construct_models(model: Type[BaseModel], df: pd.DataFrame) -> list:
+    """Build models from rows already validated at load, skipping per-row validation"""
+    fields = list(model.model_fields)
+    return [
+        model.model_construct(**dict(zip(fields, row)))
+        for row in df[fields].itertuples(index=False, name=None)
+    ]
+
+
+def _parse_amount_thresholds(description) -> Tuple[float, ...]:
+    """Sorted dollar amounts mentioned in a rule description"""
+    if not isinstance(description, str):
+        return ()
+    return tuple(sorted(float(amount.replace(",", "")) for amount in AMOUNT_PATTERN.findall(description)))
+
+
+def _parse_documentation_required(value):
+    """Convert a policy's documentation_required string into a list"""
+    if not isinstance(value, str):
+        return value
+    
+    # Parse string representation of list
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        # Fallback to simple comma-separated parsing
+        return [doc.strip() for doc in value.split(',')]
+
 
 class DataService:
     """Service for loading and querying mock data"""
@@ -18,206 +152,313 @@ class DataService:
         self._network_rules_df = None
         self._policies_df = None
         
+        # One lock per data file, so each is parsed once even under concurrent first queries
+        self._transactions_df_lock = threading.Lock()
+        self._disputes_df_lock = threading.Lock()
+        self._merchant_risk_df_lock = threading.Lock()
+        self._network_rules_df_lock = threading.Lock()
+        self._policies_df_lock = threading.Lock()
+        
+        # Row positions keyed by lookup value, built when each file loads
+        self._tx_by_card: Dict[str, np.ndarray] = {}
+        self._disputes_by_customer: Dict[str, np.ndarray] = {}
+        self._disputes_by_merchant: Dict[str, np.ndarray] = {}
+        self._risk_by_merchant: Dict[str, np.ndarray] = {}
+        self._rules_by_type: Dict[str, np.ndarray] = {}
+        self._policies_by_category: Dict[str, np.ndarray] = {}
+        
+        # Dollar thresholds parsed from each network rule's description, keyed by rule_id
+        self._rule_thresholds: Dict[str, Tuple[float, ...]] = {}
+        self._policies_by_max_amount: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        
+        # Models for every row, built once so merchant and customer lookups just pick by position
+        self._dispute_models: List[PastDispute] = []
+        self._risk_models: List[MerchantRisk] = []
+        self._policy_models: List[DisputePolicy] = []
+        self._dispute_categories = np.empty(0, dtype=object)
+        
+        # Per card: transaction day numbers sorted ascending, with the matching row positions
+        self._tx_days_by_card: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._tx_latest_day = 0
+        
+        # Query results keyed by (method, args); the data is read-only once loaded
+        self._query_cache: Dict[tuple, Any] = {}
+        
+    @_load_once("_transactions_df")
     def _load_transactions(self) -> pd.DataFrame:
         """Load transactions data"""
         if self._transactions_df is None:
-            file_path = os.path.join(self.data_path, "transactions.csv")
-            self._transactions_df = pd.read_csv(file_path)
+            df = self._read_table("transactions")
+            # Integer cents so amount lookups are an exact compare
+            df["amount_cents"] = (df["amount"] * 100).round().astype("int32")
+            # Lowercase once so merchant matches are a literal substring test
+            df["merchant_lower"] = df["merchant_name"].str.lower()
+            self._tx_by_card = df.groupby("card_last_four", sort=False).indices
+            
+            # Sort each card's rows by day so date windows are a binary search
+            days = pd.to_datetime(df["transaction_date"], cache=True).to_numpy("datetime64[D]").astype(np.int64)
+            tx_days_by_card = {}
+            for card, positions in self._tx_by_card.items():
+                order = np.argsort(days[positions], kind="stable")
+                tx_days_by_card[card] = (days[positions][order], positions[order])
+            self._tx_days_by_card = tx_days_by_card
+            self._tx_latest_day = int(days.max()) if len(days) else 0
+            
+            _validate_rows(Transaction, df)
+            self._transactions_df = df
         return self._transactions_df
     
+    @_load_once("_disputes_df")
     def _load_disputes(self) -> pd.DataFrame:
         """Load past disputes data"""
         if self._disputes_df is None:
-            file_path = os.path.join(self.data_path, "past_disputes.csv")
-            self._disputes_df = pd.read_csv(file_path)
+            df = self._read_table("past_disputes")
+            self._disputes_by_customer = df.groupby("customer_id", sort=False, observed=True).indices
+            self._disputes_by_merchant = df.groupby(df["merchant_name"].str.lower(), sort=False, observed=True).indices
+            _validate_rows(PastDispute, df)
+            self._dispute_models = _construct_models(PastDispute, df)
+            self._dispute_categories = df["dispute_category"].str.lower().to_numpy()
+            self._disputes_df = df
         return self._disputes_df
     
+    @_load_once("_merchant_risk_df")
     def _load_merchant_risk(self) -> pd.DataFrame:
         """Load merchant risk data"""
         if self._merchant_risk_df is None:
-            file_path = os.path.join(self.data_path, "merchant_risk.csv")
-            self._merchant_risk_df = pd.read_csv(file_path)
+            df = self._read_table("merchant_risk")
+            self._risk_by_merchant = df.groupby(df["merchant_name"].str.lower(), sort=False, observed=True).indices
+            _validate_rows(MerchantRisk, df)
+            self._risk_models = _construct_models(MerchantRisk, df)
+            self._merchant_risk_df = df
         return self._merchant_risk_df
     
+    @_load_once("_network_rules_df")
     def _load_network_rules(self) -> pd.DataFrame:
         """Load network rules data"""
         if self._network_rules_df is None:
-            file_path = os.path.join(self.data_path, "network_rules.csv")
-            self._network_rules_df = pd.read_csv(file_path)
+            df = self._read_table("network_rules")
+            self._rules_by_type = df.groupby(df["rule_type"].str.lower(), sort=False, observed=True).indices
+            self._rule_thresholds = dict(zip(df["rule_id"], df["description"].map(_parse_amount_thresholds)))
+            _validate_rows(NetworkRule, df)
+            self._network_rules_df = df
         return self._network_rules_df
     
+    @_load_once("_policies_df")
     def _load_policies(self) -> pd.DataFrame:
         """Load dispute policies data"""
         if self._policies_df is None:
-            file_path = os.path.join(self.data_path, "dispute_policies.csv")
-            self._policies_df = pd.read_csv(file_path)
+            df = self._read_table("dispute_policies")
+            # Parse once here rather than on every query
+            df["documentation_required"] = df["documentation_required"].map(_parse_documentation_required)
+            self._policies_by_category = df.groupby(df["category"].str.lower(), sort=False, observed=True).indices
+            
+            # Per category, max amounts sorted ascending with the matching row positions
+            max_amounts = df["max_amount"].to_numpy()
+            policies_by_max_amount = {}
+            for key, positions in self._policies_by_category.items():
+                order = np.argsort(max_amounts[positions], kind="stable")
+                policies_by_max_amount[key] = (max_amounts[positions][order], positions[order])
+            self._policies_by_max_amount = policies_by_max_amount
+            
+            _validate_rows(DisputePolicy, df)
+            self._policy_models = _construct_models(DisputePolicy, df)
+            self._policies_df = df
         return self._policies_df
     
+    def _read_table(self, name: str) -> pd.DataFrame:
+        """Load a data file, preferring a Parquet copy that is at least as new as the CSV"""
+        csv_path = os.path.join(self.data_path, f"{name}.csv")
+        parquet_path = os.path.join(self.data_path, f"{name}.parquet")
+        
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        ):
+            table = pq.read_table(parquet_path, columns=list(DATA_FILES[name].model_fields))
+        else:
+            table = read_csv_table(csv_path, DATA_FILES[name])
+        
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+    
+    @staticmethod
+    def _match_index(index: Dict[str, np.ndarray], value: str) -> np.ndarray:
+        """Row positions whose indexed value contains value, ignoring case"""
+        # Substring match over the distinct lowercase keys rather than every row
+        needle = value.lower()
+        matches = [positions for key, positions in index.items() if needle in key]
+        
+        if not matches:
+            return np.empty(0, dtype=np.intp)
+        if len(matches) == 1:
+            return matches[0]
+        return np.sort(np.concatenate(matches))
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether every data file is already loaded"""
+        return all(df is not None for df in (
+            self._transactions_df,
+            self._disputes_df,
+            self._merchant_risk_df,
+            self._network_rules_df,
+            self._policies_df,
+        ))
+    
+    def preload(self) -> None:
+        """Load all data files so the first query doesn't pay the CSV parse"""
+        if self.is_loaded:
+            return
+        
+        loaders = (
+            self._load_transactions,
+            self._load_disputes,
+            self._load_merchant_risk,
+            self._load_network_rules,
+            self._load_policies,
+        )
+        # Each loader fills its own attributes, and the Arrow reader releases the GIL
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            for future in [executor.submit(loader) for loader in loaders]:
+                future.result()
+    
+    def clear_cache(self) -> None:
+        """Drop loaded data and cached query results so the next query reloads from disk"""
+        self._transactions_df = None
+        self._disputes_df = None
+        self._merchant_risk_df = None
+        self._network_rules_df = None
+        self._policies_df = None
+        self._query_cache.clear()
+    
+    @_cached_query
     def get_transactions_by_card(self, card_last_four: str, days: int = 90) -> List[Transaction]:
         """Get transactions for a card in the last N days"""
         df = self._load_transactions()
         
-        # Convert card_last_four to string for comparison (handle both string and int types in CSV)
-        df_card_str = df['card_last_four'].astype(str)
+        # Look up the card's rows in the index instead of scanning the column
+        window = self._tx_days_by_card.get(str(card_last_four))
+        if window is None:
+            return []
+        card_days, positions = window
         
-        # Filter by card last four digits
-        filtered_df = df[df_card_str == str(card_last_four)]
+        # The mock data is a fixed snapshot, so the window ends at its latest transaction
+        start = np.searchsorted(card_days, self._tx_latest_day - days)
+        filtered_df = df.iloc[np.sort(positions[start:])]
         
         # Convert to Transaction objects
-        transactions = []
-        for _, row in filtered_df.iterrows():
-            row_dict = row.to_dict()
-            # Convert numeric fields to strings where needed
-            row_dict['card_number'] = str(row_dict['card_number'])
-            row_dict['card_last_four'] = str(row_dict['card_last_four'])
-            transactions.append(Transaction(**row_dict))
-        
-        return transactions
+        return _construct_models(Transaction, filtered_df)
     
+    @_cached_query
     def find_transaction(self, card_last_four: str, amount: float, merchant_name: str) -> Optional[Transaction]:
         """Find a specific transaction by card, amount, and merchant"""
         df = self._load_transactions()
         
-        # Convert card_last_four to string for comparison (handle both string and int types in CSV)
-        df_card_str = df['card_last_four'].astype(str)
+        # Narrow to the card's rows first, then filter by amount and merchant
+        positions = self._tx_by_card.get(str(card_last_four))
+        if positions is None:
+            return None
+        df = df.iloc[positions]
         
-        # Filter by criteria
-        filtered_df = df[
-            (df_card_str == str(card_last_four)) &
-            (abs(df['amount'] - amount) < 0.01) &  # Allow small floating point differences
-            (df['merchant_name'].str.contains(merchant_name, case=False, na=False))
-        ]
+        # Filter by the cheap amount compare first so the merchant match only sees its survivors
+        df = df[df['amount_cents'] == round(amount * 100)]
+        filtered_df = df[df['merchant_lower'].str.contains(merchant_name.lower(), na=False, regex=False)]
         
         if not filtered_df.empty:
             # Return the first match
-            row = filtered_df.iloc[0].copy()
-            # Convert numeric fields to strings where needed
-            row_dict = row.to_dict()
-            row_dict['card_number'] = str(row_dict['card_number'])
-            row_dict['card_last_four'] = str(row_dict['card_last_four'])
-            return Transaction(**row_dict)
+            return _construct_models(Transaction, filtered_df.iloc[:1])[0]
         
         return None
     
-    def get_past_disputes_by_merchant(self, merchant_name: str) -> List[PastDispute]:
-        """Get past disputes for a specific merchant"""
-        df = self._load_disputes()
+    @_cached_query
+    def get_past_disputes_by_merchant(self, merchant_name: str, category: Optional[str] = None,
+                                      limit: Optional[int] = None) -> List[PastDispute]:
+        """Get past disputes for a specific merchant, optionally by category and up to limit"""
+        self._load_disputes()
         
         # Filter by merchant name (case insensitive)
-        filtered_df = df[df['merchant_name'].str.contains(merchant_name, case=False, na=False)]
+        positions = self._match_index(self._disputes_by_merchant, merchant_name)
         
-        disputes = []
-        for _, row in filtered_df.iterrows():
-            disputes.append(PastDispute(**row.to_dict()))
+        if category is not None:
+            positions = positions[self._dispute_categories[positions] == category.lower()]
+        if limit is not None:
+            positions = positions[:limit]
         
-        return disputes
+        return [self._dispute_models[i] for i in positions]
     
+    @_cached_query
     def get_past_disputes_by_customer(self, customer_id: str) -> List[PastDispute]:
         """Get past disputes for a specific customer"""
-        df = self._load_disputes()
+        self._load_disputes()
         
-        # Filter by customer ID
-        filtered_df = df[df['customer_id'] == customer_id]
+        # Look up the customer's rows in the index
+        positions = self._disputes_by_customer.get(customer_id)
+        if positions is None:
+            return []
         
-        disputes = []
-        for _, row in filtered_df.iterrows():
-            disputes.append(PastDispute(**row.to_dict()))
-        
-        return disputes
+        return [self._dispute_models[i] for i in positions]
     
+    @_cached_query
     def get_merchant_risk_data(self, merchant_name: str) -> Optional[MerchantRisk]:
         """Get risk data for a specific merchant"""
-        df = self._load_merchant_risk()
+        self._load_merchant_risk()
         
         # Filter by merchant name (case insensitive)
-        filtered_df = df[df['merchant_name'].str.contains(merchant_name, case=False, na=False)]
+        positions = self._match_index(self._risk_by_merchant, merchant_name)
         
-        if not filtered_df.empty:
-            row = filtered_df.iloc[0]
-            return MerchantRisk(**row.to_dict())
+        if len(positions):
+            return self._risk_models[positions[0]]
         
         return None
     
+    @_cached_query
     def get_dispute_policies_by_category(self, category: str) -> List[DisputePolicy]:
         """Get dispute policies by category"""
         df = self._load_policies()
         
         # Filter by category
-        filtered_df = df[df['category'].str.contains(category, case=False, na=False)]
-        
-        policies = []
-        for _, row in filtered_df.iterrows():
-            # Convert documentation_required from string to list
-            doc_req = row['documentation_required']
-            if isinstance(doc_req, str):
-                # Parse string representation of list
-                import ast
-                try:
-                    doc_req = ast.literal_eval(doc_req)
-                except (ValueError, SyntaxError):
-                    # Fallback to simple comma-separated parsing
-                    doc_req = [doc.strip() for doc in doc_req.split(',')]
-            row_dict = row.to_dict()
-            row_dict['documentation_required'] = doc_req
-            
-            policies.append(DisputePolicy(**row_dict))
+        filtered_df = df.iloc[self._match_index(self._policies_by_category, category)]
         
-        return policies
+        return _construct_models(DisputePolicy, filtered_df)
     
+    @_cached_query
     def get_network_rules_by_category(self, category: str) -> List[NetworkRule]:
         """Get network rules by dispute category"""
         df = self._load_network_rules()
         
         # Map categories to rule types
-        category_map = {
-            "Fraud": "Fraud",
-            "Billing Error": "Processing Error",
-            "Authorization Issue": "Authorization"
-        }
-        
-        rule_type = category_map.get(category, category)
-        filtered_df = df[df['rule_type'].str.contains(rule_type, case=False, na=False)]
-        
-        rules = []
-        for _, row in filtered_df.iterrows():
-            rules.append(NetworkRule(**row.to_dict()))
+        rule_type = CATEGORY_MAP.get(category, category)
+        filtered_df = df.iloc[self._match_index(self._rules_by_type, rule_type)]
         
-        return rules
+        return _construct_models(NetworkRule, filtered_df)
     
+    def get_rule_thresholds(self, rule_id: str) -> Tuple[float, ...]:
+        """Get the sorted dollar thresholds mentioned in a network rule's description"""
+        self._load_network_rules()
+        return self._rule_thresholds.get(rule_id, ())
+    
+    @_cached_query
     def get_applicable_policies(self, category: str, amount: float) -> List[DisputePolicy]:
         """Get applicable dispute policies"""
-        df = self._load_policies()
+        self._load_policies()
         
-        # Filter by category and amount
-        filtered_df = df[
-            (df['category'].str.contains(category, case=False, na=False)) &
-            (df['max_amount'] >= amount)
+        # Within each matching category, policies covering the amount start at the bisect point
+        needle = category.lower()
+        matches = [
+            positions[np.searchsorted(max_amounts, amount, side="left"):]
+            for key, (max_amounts, positions) in self._policies_by_max_amount.items()
+            if needle in key
         ]
+        if not matches:
+            return []
         
-        policies = []
-        for _, row in filtered_df.iterrows():
-            # Convert documentation_required from string to list
-            doc_req = row['documentation_required']
-            if isinstance(doc_req, str):
-                # Parse string representation of list
-                import ast
-                try:
-                    doc_req = ast.literal_eval(doc_req)
-                except (ValueError, SyntaxError):
-                    # Fallback to simple comma-separated parsing
-                    doc_req = [doc.strip() for doc in doc_req.split(',')]
-            row_dict = row.to_dict()
-            row_dict['documentation_required'] = doc_req
-            
-            policies.append(DisputePolicy(**row_dict))
-        
-        return policies
+        return [self._policy_models[i] for i in np.sort(np.concatenate(matches))]
     
+    @_cached_query
     def get_all_merchants(self) -> List[str]:
         """Get list of all merchants"""
         df = self._load_transactions()
         return df['merchant_name'].unique().tolist()
     
+    @_cached_query
     def get_transaction_stats(self) -> dict:
         """Get basic transaction statistics"""
         df = self._load_transactions()
@@ -232,4 +473,12 @@ class DataService:
                 "start": df['transaction_date'].min(),
                 "end": df['transaction_date'].max()
             }
-        }
\ No newline at end of file
+        }
+
+
+@functools.cache
+def get_data_service(data_path: str = "./data") -> DataService:
+    """Shared DataService per data path, so each process parses the files once"""
+    # Loaders build each index in a local and assign it whole, and set the frame
+    # last, so a concurrent query never sees a partly built table or index
+    return DataService(data_path)
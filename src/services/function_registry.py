@@ -1,421 +1,524 @@
 import asyncio
+import json
 import logging
-from typing import Dict, List, Any, Optional, Callable
-from datetime import datetime
+import os
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
+import fastjsonschema
+from pydantic import BaseModel
+
+from .async_batcher import AsyncBatcher
+from .single_flight import SingleFlight
 from .data_service import DataService
-from .mock_api_service import MockAPIService
+from .mock_api_service import MockAPIService, calculate_temporary_credit_amount
+from .ttl_cache import ttl_cached
 
 logger = logging.getLogger(__name__)
 
+# Functions without side effects, safe to run concurrently with each other
+PARALLEL_SAFE_FUNCTIONS = frozenset({
+    "search_past_disputes",
+    "assess_merchant_risk",
+    "check_network_rules",
+    "find_transaction_details",
+    "get_customer_dispute_history",
+    "check_dispute_policies",
+    "check_account_eligibility",
+    "calculate_temporary_credit",
+})
 
-class FunctionRegistry:
-    """Registry of functions available to the banking-dispute-assistant-v1"""
-    
-    def __init__(self, data_service: DataService, mock_api_service: MockAPIService):
-        self.data_service = data_service
-        self.mock_api_service = mock_api_service
-        self._functions = {}
-        self._register_functions()
+# Parallel-safe lookups over the static data files, whose results hold for a whole
+# dispute; account status is a live check and credit sizing follows the findings,
+# so those two always run fresh
+CACHEABLE_FUNCTIONS = PARALLEL_SAFE_FUNCTIONS - {"check_account_eligibility", "calculate_temporary_credit"}
+
+# Past dispute resolutions counted as successful
+SUCCESS_RESOLUTIONS = frozenset({"approved", "resolved"})
+
+# Seconds a read-only analysis result is reused for repeat calls with the same arguments
+ANALYSIS_CACHE_TTL = 60.0
+
+# Maximum number of data model dumps kept by _dump
+DUMP_CACHE_SIZE = 4096
+_dump_cache: Dict[int, Tuple[BaseModel, Dict[str, Any]]] = {}
+
+
+def _dump(model: BaseModel) -> Dict[str, Any]:
+    """JSON-mode dump of a data model, computed once per model instance"""
+    # The entry holds the model itself, so its id can't be reused while cached
+    entry = _dump_cache.get(id(model))
+    if entry is None or entry[0] is not model:
+        entry = (model, model.__pydantic_serializer__.to_python(model, mode="json"))
+        if len(_dump_cache) >= DUMP_CACHE_SIZE:
+            _dump_cache.pop(next(iter(_dump_cache)), None)
+        _dump_cache[id(model)] = entry
+    return entry[1]
+
+
+def _summarize_disputes(disputes: List[BaseModel]) -> Tuple[List[Dict[str, Any]], float]:
+    """Dump past disputes and compute their success rate in a single pass"""
+    dumps = []
+    successful = 0
+    for d in disputes:
+        dumps.append(_dump(d))
+        if d.resolution.lower() in SUCCESS_RESOLUTIONS:
+            successful += 1
     
-    def _register_functions(self):
-        """Register all available functions"""
-        
-        # Analysis Functions
-        self._functions["search_past_disputes"] = {
-            "function": self._search_past_disputes,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "search_past_disputes",
-                    "description": "Search for past disputes involving a specific merchant to identify patterns and success rates",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "merchant_name": {
-                                "type": "string",
-                                "description": "Name of the merchant to search disputes for"
-                            },
-                            "category": {
-                                "type": "string",
-                                "enum": ["Fraud", "Billing Error", "Authorization Issue", "all"],
-                                "description": "Dispute category to filter by, or 'all' for all categories"
-                            },
-                            "limit": {
-                                "type": "integer",
-                                "description": "Maximum number of past disputes to return",
-                                "default": 10
-                            }
-                        },
-                        "required": ["merchant_name"]
+    return dumps, (successful / len(dumps) if dumps else 0.0)
+
+
+# Tool schemas offered to the model, built once at import
+FUNCTION_SCHEMAS = (
+    # Analysis Functions
+    {
+        "type": "function",
+        "function": {
+            "name": "search_past_disputes",
+            "description": "Search for past disputes involving a specific merchant to identify patterns and success rates",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "merchant_name": {
+                        "type": "string",
+                        "description": "Name of the merchant to search disputes for"
+                    },
+                    "category": {
+                        "type": "string",
+                        "enum": ["Fraud", "Billing Error", "Authorization Issue", "all"],
+                        "description": "Dispute category to filter by, or 'all' for all categories"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of past disputes to return",
+                        "default": 10
                     }
-                }
+                },
+                "required": ["merchant_name"]
             }
         }
-        
-        self._functions["assess_merchant_risk"] = {
-            "function": self._assess_merchant_risk,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "assess_merchant_risk",
-                    "description": "Get comprehensive risk assessment data for a merchant including fraud rates and dispute patterns",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "merchant_name": {
-                                "type": "string",
-                                "description": "Name of the merchant to assess"
-                            }
-                        },
-                        "required": ["merchant_name"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "assess_merchant_risk",
+            "description": "Get comprehensive risk assessment data for a merchant including fraud rates and dispute patterns",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "merchant_name": {
+                        "type": "string",
+                        "description": "Name of the merchant to assess"
                     }
-                }
+                },
+                "required": ["merchant_name"]
             }
         }
-        
-        self._functions["check_network_rules"] = {
-            "function": self._check_network_rules,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "check_network_rules",
-                    "description": "Check applicable payment network rules (Visa/Mastercard) for dispute eligibility and requirements",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dispute_category": {
-                                "type": "string",
-                                "enum": ["Fraud", "Billing Error", "Authorization Issue"],
-                                "description": "Category of the dispute"
-                            },
-                            "transaction_amount": {
-                                "type": "number",
-                                "description": "Amount of the disputed transaction"
-                            }
-                        },
-                        "required": ["dispute_category", "transaction_amount"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "check_network_rules",
+            "description": "Check applicable payment network rules (Visa/Mastercard) for dispute eligibility and requirements",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "dispute_category": {
+                        "type": "string",
+                        "enum": ["Fraud", "Billing Error", "Authorization Issue"],
+                        "description": "Category of the dispute"
+                    },
+                    "transaction_amount": {
+                        "type": "number",
+                        "description": "Amount of the disputed transaction"
                     }
-                }
+                },
+                "required": ["dispute_category", "transaction_amount"]
             }
         }
-        
-        self._functions["find_transaction_details"] = {
-            "function": self._find_transaction_details,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "find_transaction_details",
-                    "description": "Locate and retrieve detailed information about a specific transaction",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "card_last_four": {
-                                "type": "string",
-                                "description": "Last four digits of the card"
-                            },
-                            "amount": {
-                                "type": "number",
-                                "description": "Transaction amount"
-                            },
-                            "merchant_name": {
-                                "type": "string",
-                                "description": "Name of the merchant"
-                            }
-                        },
-                        "required": ["card_last_four", "amount", "merchant_name"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "find_transaction_details",
+            "description": "Locate and retrieve detailed information about a specific transaction",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "card_last_four": {
+                        "type": "string",
+                        "description": "Last four digits of the card"
+                    },
+                    "amount": {
+                        "type": "number",
+                        "description": "Transaction amount"
+                    },
+                    "merchant_name": {
+                        "type": "string",
+                        "description": "Name of the merchant"
                     }
-                }
+                },
+                "required": ["card_last_four", "amount", "merchant_name"]
             }
         }
-        
-        self._functions["get_customer_dispute_history"] = {
-            "function": self._get_customer_dispute_history,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "get_customer_dispute_history",
-                    "description": "Get the customer's past dispute history to identify patterns and assess credibility",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_id": {
-                                "type": "string",
-                                "description": "Customer ID to look up"
-                            },
-                            "days": {
-                                "type": "integer",
-                                "description": "Number of days back to search",
-                                "default": 365
-                            }
-                        },
-                        "required": ["customer_id"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "get_customer_dispute_history",
+            "description": "Get the customer's past dispute history to identify patterns and assess credibility",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Customer ID to look up"
+                    },
+                    "days": {
+                        "type": "integer",
+                        "description": "Number of days back to search",
+                        "default": 365
                     }
-                }
+                },
+                "required": ["customer_id"]
             }
         }
-        
-        self._functions["check_dispute_policies"] = {
-            "function": self._check_dispute_policies,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "check_dispute_policies",
-                    "description": "Check internal bank policies for dispute handling, time limits, and eligibility criteria",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "category": {
-                                "type": "string",
-                                "enum": ["Fraud", "Billing Error", "Authorization Issue"],
-                                "description": "Dispute category"
-                            },
-                            "amount": {
-                                "type": "number",
-                                "description": "Dispute amount"
-                            }
-                        },
-                        "required": ["category", "amount"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "check_dispute_policies",
+            "description": "Check internal bank policies for dispute handling, time limits, and eligibility criteria",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "category": {
+                        "type": "string",
+                        "enum": ["Fraud", "Billing Error", "Authorization Issue"],
+                        "description": "Dispute category"
+                    },
+                    "amount": {
+                        "type": "number",
+                        "description": "Dispute amount"
                     }
-                }
+                },
+                "required": ["category", "amount"]
             }
         }
-        
-        # Action Functions
-        self._functions["check_account_eligibility"] = {
-            "function": self._check_account_eligibility,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "check_account_eligibility",
-                    "description": "Check if customer account is eligible for dispute filing and temporary credits",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_id": {
-                                "type": "string",
-                                "description": "Customer ID to check"
-                            }
-                        },
-                        "required": ["customer_id"]
+    },
+
+    # Action Functions
+    {
+        "type": "function",
+        "function": {
+            "name": "check_account_eligibility",
+            "description": "Check if customer account is eligible for dispute filing and temporary credits",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Customer ID to check"
                     }
-                }
+                },
+                "required": ["customer_id"]
             }
         }
-        
-        self._functions["calculate_temporary_credit"] = {
-            "function": self._calculate_temporary_credit,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "calculate_temporary_credit",
-                    "description": "Calculate the appropriate temporary credit amount based on dispute details and policies",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_id": {
-                                "type": "string",
-                                "description": "Customer ID"
-                            },
-                            "dispute_amount": {
-                                "type": "number",
-                                "description": "Amount being disputed"
-                            },
-                            "dispute_category": {
-                                "type": "string",
-                                "enum": ["Fraud", "Billing Error", "Authorization Issue"],
-                                "description": "Category of dispute"
-                            }
-                        },
-                        "required": ["customer_id", "dispute_amount", "dispute_category"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "calculate_temporary_credit",
+            "description": "Calculate the appropriate temporary credit amount based on dispute details and policies",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Customer ID"
+                    },
+                    "dispute_amount": {
+                        "type": "number",
+                        "description": "Amount being disputed"
+                    },
+                    "dispute_category": {
+                        "type": "string",
+                        "enum": ["Fraud", "Billing Error", "Authorization Issue"],
+                        "description": "Category of dispute"
                     }
-                }
+                },
+                "required": ["customer_id", "dispute_amount", "dispute_category"]
             }
         }
-        
-        self._functions["issue_temporary_credit"] = {
-            "function": self._issue_temporary_credit,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "issue_temporary_credit",
-                    "description": "Issue a temporary credit to the customer's account",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_id": {
-                                "type": "string",
-                                "description": "Customer ID"
-                            },
-                            "amount": {
-                                "type": "number",
-                                "description": "Credit amount to issue"
-                            },
-                            "dispute_id": {
-                                "type": "string",
-                                "description": "Associated dispute ID"
-                            }
-                        },
-                        "required": ["customer_id", "amount", "dispute_id"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "issue_temporary_credit",
+            "description": "Issue a temporary credit to the customer's account",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Customer ID"
+                    },
+                    "amount": {
+                        "type": "number",
+                        "description": "Credit amount to issue"
+                    },
+                    "dispute_id": {
+                        "type": "string",
+                        "description": "Associated dispute ID"
                     }
-                }
+                },
+                "required": ["customer_id", "amount", "dispute_id"]
             }
         }
-        
-        self._functions["file_dispute_with_network"] = {
-            "function": self._file_dispute_with_network,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "file_dispute_with_network",
-                    "description": "File the dispute with the payment network (Visa/Mastercard)",
-                    "parameters": {
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "file_dispute_with_network",
+            "description": "File the dispute with the payment network (Visa/Mastercard)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "dispute_data": {
                         "type": "object",
+                        "description": "Complete dispute information",
                         "properties": {
-                            "dispute_data": {
-                                "type": "object",
-                                "description": "Complete dispute information",
-                                "properties": {
-                                    "customer_id": {"type": "string"},
-                                    "transaction_id": {"type": "string"},
-                                    "dispute_category": {"type": "string"},
-                                    "dispute_reason": {"type": "string"},
-                                    "amount": {"type": "number"},
-                                    "merchant_name": {"type": "string"}
-                                },
-                                "required": ["customer_id", "dispute_category", "dispute_reason", "amount", "merchant_name"]
-                            }
+                            "customer_id": {"type": "string"},
+                            "transaction_id": {"type": "string"},
+                            "dispute_category": {"type": "string"},
+                            "dispute_reason": {"type": "string"},
+                            "amount": {"type": "number"},
+                            "merchant_name": {"type": "string"}
                         },
-                        "required": ["dispute_data"]
+                        "required": ["customer_id", "dispute_category", "dispute_reason", "amount", "merchant_name"]
                     }
-                }
+                },
+                "required": ["dispute_data"]
             }
         }
-        
-        self._functions["send_customer_notification"] = {
-            "function": self._send_customer_notification,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "send_customer_notification",
-                    "description": "Send notification to customer about dispute status or next steps",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_id": {
-                                "type": "string",
-                                "description": "Customer ID"
-                            },
-                            "message": {
-                                "type": "string",
-                                "description": "Message to send to customer"
-                            },
-                            "channel": {
-                                "type": "string",
-                                "enum": ["email", "sms", "both"],
-                                "description": "Communication channel",
-                                "default": "email"
-                            }
-                        },
-                        "required": ["customer_id", "message"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "send_customer_notification",
+            "description": "Send notification to customer about dispute status or next steps",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_id": {
+                        "type": "string",
+                        "description": "Customer ID"
+                    },
+                    "message": {
+                        "type": "string",
+                        "description": "Message to send to customer"
+                    },
+                    "channel": {
+                        "type": "string",
+                        "enum": ["email", "sms", "both"],
+                        "description": "Communication channel",
+                        "default": "email"
                     }
-                }
+                },
+                "required": ["customer_id", "message"]
             }
         }
-        
-        self._functions["update_case_management"] = {
-            "function": self._update_case_management,
-            "schema": {
-                "type": "function",
-                "function": {
-                    "name": "update_case_management",
-                    "description": "Update the case management system with dispute status and notes",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dispute_id": {
-                                "type": "string",
-                                "description": "Dispute ID"
-                            },
-                            "status": {
-                                "type": "string",
-                                "enum": ["Pending", "Investigating", "Approved", "Denied", "Filed"],
-                                "description": "Current dispute status"
-                            },
-                            "notes": {
-                                "type": "string",
-                                "description": "Case notes and findings"
-                            }
-                        },
-                        "required": ["dispute_id", "status", "notes"]
+    },
+
+    {
+        "type": "function",
+        "function": {
+            "name": "update_case_management",
+            "description": "Update the case management system with dispute status and notes",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "dispute_id": {
+                        "type": "string",
+                        "description": "Dispute ID"
+                    },
+                    "status": {
+                        "type": "string",
+                        "enum": ["Pending", "Investigating", "Approved", "Denied", "Filed"],
+                        "description": "Current dispute status"
+                    },
+                    "notes": {
+                        "type": "string",
+                        "description": "Case notes and findings"
                     }
-                }
+                },
+                "required": ["dispute_id", "status", "notes"]
             }
         }
+    },
+)
+
+# Argument validators compiled once from each schema's parameters; defaults are
+# left to the handlers so the caller's arguments dict is never modified
+ARGUMENT_VALIDATORS = {
+    schema["function"]["name"]: fastjsonschema.compile(schema["function"]["parameters"], use_default=False)
+    for schema in FUNCTION_SCHEMAS
+}
+
+
+class FunctionRegistry:
+    """Registry of functions available to the banking-dispute-assistant-v1"""
+    
+    def __init__(self, data_service: DataService, mock_api_service: MockAPIService):
+        self.data_service = data_service
+        self.mock_api_service = mock_api_service
+        self._handlers: Dict[str, Callable] = {}
+        # Futures for parallel-safe calls in progress, keyed by (event loop, name, arguments)
+        self._single_flight = SingleFlight()
+        self._action_batchers = self._create_action_batchers()
+        self._register_functions()
     
-    def get_function_schemas(self) -> List[Dict]:
-        """Return all function schemas for OpenAI"""
-        return [func_data["schema"] for func_data in self._functions.values()]
+    def _create_action_batchers(self) -> Dict[str, AsyncBatcher]:
+        """Batchers that coalesce action API calls, when ACTION_BATCH_WINDOW_MS is set"""
+        window = float(os.getenv("ACTION_BATCH_WINDOW_MS", "0")) / 1000
+        if window <= 0:
+            return {}
+        
+        # Bulk endpoints are optional; without one a batch falls back to per-item calls
+        api = self.mock_api_service
+        return {
+            "issue_temporary_credit": AsyncBatcher(
+                api.issue_temporary_credit, getattr(api, "issue_temporary_credits_bulk", None), max_wait=window
+            ),
+            "send_customer_notification": AsyncBatcher(
+                api.notify_customer, getattr(api, "notify_customers_bulk", None), max_wait=window
+            ),
+            "update_case_management": AsyncBatcher(
+                api.update_case_management, getattr(api, "update_case_management_bulk", None), max_wait=window
+            ),
+        }
+    
+    async def _call_action(self, function_name: str, api_call: Callable, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send an action payload through its batcher if batching is enabled"""
+        batcher = self._action_batchers.get(function_name)
+        if batcher is None:
+            return await api_call(payload)
+        return await batcher.submit(payload)
+    
+    def _register_functions(self):
+        """Register all available functions"""
+        for schema in FUNCTION_SCHEMAS:
+            name = schema["function"]["name"]
+            self._handlers[name] = getattr(self, f"_{name}")
     
-    async def execute_function(self, function_name: str, arguments: Dict[str, Any], session_context: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    def get_function_schemas(self) -> Tuple[Dict, ...]:
+        """Return all function schemas for OpenAI (shared; copy before modifying)"""
+        return FUNCTION_SCHEMAS
+    
+    def is_parallel_safe(self, function_name: str) -> bool:
+        """Whether a function has no side effects and can run alongside others"""
+        return function_name in PARALLEL_SAFE_FUNCTIONS
+    
+    def is_cacheable(self, function_name: str) -> bool:
+        """Whether a function's result can be started early and reused within one dispute"""
+        return function_name in CACHEABLE_FUNCTIONS
+    
+    async def execute_function(self, function_name: str, arguments: Dict[str, Any], session_context: Optional[Dict[str, str]] = None,
+                               validate_arguments: bool = True) -> Dict[str, Any]:
         """Execute a function call with optional session context"""
-        if function_name not in self._functions:
+        function_handler = self._handlers.get(function_name)
+        if function_handler is None:
             raise ValueError(f"Unknown function: {function_name}")
         
-        function_handler = self._functions[function_name]["function"]
+        if validate_arguments:
+            try:
+                ARGUMENT_VALIDATORS[function_name](arguments)
+            except fastjsonschema.JsonSchemaValueException as e:
+                logger.error(
+                    "Function %s rejected arguments: %s", function_name, e.message,
+                    extra=self._log_extra(function_name, session_context)
+                )
+                return {"success": False, "error": f"Invalid arguments: {e.message}"}
+        
+        if function_name not in PARALLEL_SAFE_FUNCTIONS:
+            return await self._run_function(function_name, function_handler, arguments, session_context)
+        
+        # Identical calls already running on this event loop share one result
+        key = (function_name, json.dumps(arguments, sort_keys=True, default=str))
+        return await self._single_flight.run(
+            key, lambda: self._run_function(function_name, function_handler, arguments, session_context)
+        )
+    
+    async def _run_function(self, function_name: str, function_handler: Callable, arguments: Dict[str, Any], session_context: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """Run a handler, logging the call and wrapping its result or error"""
+        # Skip building log fields for every call when INFO is disabled
+        log_info = logger.isEnabledFor(logging.INFO)
+        extra_fields = self._log_extra(function_name, session_context) if log_info else None
         
         try:
-            # Create log entry with session context
-            extra_fields = {"function": function_name}
-            if session_context:
-                extra_fields.update(session_context)
-            
-            logger.info(f"Executing function {function_name} with arguments: {arguments}", extra=extra_fields)
+            if log_info:
+                logger.info("Executing function %s with arguments: %s", function_name, arguments, extra=extra_fields)
             result = await function_handler(**arguments)
-            logger.info(f"Function {function_name} completed successfully", extra=extra_fields)
+            if log_info:
+                logger.info("Function %s completed successfully", function_name, extra=extra_fields)
             return {"success": True, "data": result}
         except Exception as e:
-            extra_fields = {"function": function_name}
-            if session_context:
-                extra_fields.update(session_context)
-            logger.error(f"Function {function_name} failed: {str(e)}", extra=extra_fields)
+            logger.error(
+                "Function %s failed: %s", function_name, e,
+                extra=extra_fields or self._log_extra(function_name, session_context)
+            )
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _log_extra(function_name: str, session_context: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Log extra fields for a function call, including the session context"""
+        extra_fields = {"function": function_name}
+        if session_context:
+            extra_fields.update(session_context)
+        return extra_fields
+    
     # Function Implementations
+    # DataService lookups are synchronous pandas work, so they run in a worker
+    # thread to keep the event loop free for the other calls in the same turn
+    @ttl_cached(ttl=ANALYSIS_CACHE_TTL)
     async def _search_past_disputes(self, merchant_name: str, category: str = "all", limit: int = 10) -> Dict[str, Any]:
         """Search past disputes for merchant patterns"""
-        past_disputes = self.data_service.get_past_disputes_by_merchant(merchant_name)
-        
-        if category != "all":
-            past_disputes = [d for d in past_disputes if d.dispute_category.lower() == category.lower()]
-        
-        # Limit results
-        past_disputes = past_disputes[:limit]
+        past_disputes = await asyncio.to_thread(
+            self.data_service.get_past_disputes_by_merchant,
+            merchant_name,
+            None if category == "all" else category,
+            limit
+        )
         
         # Calculate statistics
-        total_disputes = len(past_disputes)
-        if total_disputes > 0:
-            successful = len([d for d in past_disputes if d.resolution.lower() in ["approved", "resolved"]])
-            success_rate = successful / total_disputes
-        else:
-            success_rate = 0.0
+        disputes, success_rate = _summarize_disputes(past_disputes)
+        total_disputes = len(disputes)
         
         return {
             "merchant_name": merchant_name,
             "total_disputes_found": total_disputes,
             "success_rate": success_rate,
-            "disputes": [d.dict() for d in past_disputes],
+            "disputes": disputes,
             "analysis": f"Found {total_disputes} past disputes for {merchant_name} with {success_rate:.1%} success rate"
         }
     
+    @ttl_cached(ttl=ANALYSIS_CACHE_TTL)
     async def _assess_merchant_risk(self, merchant_name: str) -> Dict[str, Any]:
         """Get merchant risk assessment"""
-        merchant_risk = self.data_service.get_merchant_risk_data(merchant_name)
+        merchant_risk = await asyncio.to_thread(self.data_service.get_merchant_risk_data, merchant_name)
         
         if merchant_risk:
             return {
                 "merchant_found": True,
-                "risk_data": merchant_risk.dict(),
+                "risk_data": _dump(merchant_risk),
                 "risk_level": "High" if merchant_risk.risk_score > 7 else "Medium" if merchant_risk.risk_score > 4 else "Low",
                 "recommendation": "Proceed with caution" if merchant_risk.risk_score > 7 else "Standard processing"
             }
@@ -426,35 +529,39 @@ class FunctionRegistry:
                 "recommendation": "No risk data available - proceed with standard analysis"
             }
     
+    @ttl_cached(ttl=ANALYSIS_CACHE_TTL)
     async def _check_network_rules(self, dispute_category: str, transaction_amount: float) -> Dict[str, Any]:
         """Check payment network rules"""
-        network_rules = self.data_service.get_network_rules_by_category(dispute_category)
+        network_rules = await asyncio.to_thread(self.data_service.get_network_rules_by_category, dispute_category)
         
+        # A rule specifically applies when the amount meets a dollar threshold in its description
         applicable_rules = []
         for rule in network_rules:
-            if rule.description and str(transaction_amount) in rule.description:
-                applicable_rules.append(rule.dict())
+            thresholds = self.data_service.get_rule_thresholds(rule.rule_id)
+            if thresholds and transaction_amount >= thresholds[0]:
+                applicable_rules.append(_dump(rule))
         
         # If no specific rules, get general category rules
         if not applicable_rules:
-            applicable_rules = [rule.dict() for rule in network_rules[:3]]  # Top 3 general rules
+            applicable_rules = [_dump(rule) for rule in network_rules[:3]]  # Top 3 general rules
         
+        rules_count = len(applicable_rules)
         return {
             "dispute_category": dispute_category,
             "transaction_amount": transaction_amount,
             "applicable_rules": applicable_rules,
-            "rules_count": len(applicable_rules),
-            "analysis": f"Found {len(applicable_rules)} applicable network rules for {dispute_category} disputes"
+            "rules_count": rules_count,
+            "analysis": f"Found {rules_count} applicable network rules for {dispute_category} disputes"
         }
     
     async def _find_transaction_details(self, card_last_four: str, amount: float, merchant_name: str) -> Dict[str, Any]:
         """Find specific transaction details"""
-        transaction = self.data_service.find_transaction(card_last_four, amount, merchant_name)
+        transaction = await asyncio.to_thread(self.data_service.find_transaction, card_last_four, amount, merchant_name)
         
         if transaction:
             return {
                 "transaction_found": True,
-                "transaction": transaction.dict(),
+                "transaction": _dump(transaction),
                 "analysis": f"Found matching transaction: {transaction.transaction_id}"
             }
         else:
@@ -463,42 +570,36 @@ class FunctionRegistry:
                 "analysis": f"No matching transaction found for card {card_last_four}, amount ${amount}, merchant {merchant_name}"
             }
     
+    @ttl_cached(ttl=ANALYSIS_CACHE_TTL)
     async def _get_customer_dispute_history(self, customer_id: str, days: int = 365) -> Dict[str, Any]:
         """Get customer's dispute history"""
-        customer_disputes = self.data_service.get_past_disputes_by_customer(customer_id)
+        customer_disputes = await asyncio.to_thread(self.data_service.get_past_disputes_by_customer, customer_id)
         
         # Filter by days if needed (simplified for mock data)
-        total_disputes = len(customer_disputes)
-        
-        if total_disputes > 0:
-            successful = len([d for d in customer_disputes if d.resolution.lower() in ["approved", "resolved"]])
-            success_rate = successful / total_disputes
-        else:
-            success_rate = 0.0
+        disputes, success_rate = _summarize_disputes(customer_disputes)
+        total_disputes = len(disputes)
         
         return {
             "customer_id": customer_id,
             "total_disputes": total_disputes,
             "success_rate": success_rate,
-            "disputes": [d.dict() for d in customer_disputes],
+            "disputes": disputes,
             "analysis": f"Customer has {total_disputes} disputes in history with {success_rate:.1%} success rate"
         }
     
+    @ttl_cached(ttl=ANALYSIS_CACHE_TTL)
     async def _check_dispute_policies(self, category: str, amount: float) -> Dict[str, Any]:
         """Check internal dispute policies"""
-        policies = self.data_service.get_dispute_policies_by_category(category)
-        
-        applicable_policies = []
-        for policy in policies:
-            if amount <= policy.max_amount:
-                applicable_policies.append(policy.dict())
+        policies = await asyncio.to_thread(self.data_service.get_applicable_policies, category, amount)
+        applicable_policies = [_dump(policy) for policy in policies]
         
+        policies_count = len(applicable_policies)
         return {
             "category": category,
             "amount": amount,
             "applicable_policies": applicable_policies,
-            "policies_count": len(applicable_policies),
-            "analysis": f"Found {len(applicable_policies)} applicable policies for {category} disputes of ${amount}"
+            "policies_count": policies_count,
+            "analysis": f"Found {policies_count} applicable policies for {category} disputes of ${amount}"
         }
     
     async def _check_account_eligibility(self, customer_id: str) -> Dict[str, Any]:
@@ -509,17 +610,16 @@ class FunctionRegistry:
     async def _calculate_temporary_credit(self, customer_id: str, dispute_amount: float, dispute_category: str) -> Dict[str, Any]:
         """Calculate temporary credit amount"""
         # Use existing utility function
-        from .mock_api_service import calculate_temporary_credit_amount
-        
-        credit_amount = calculate_temporary_credit_amount(dispute_amount, dispute_category)
+        credit_amount = await calculate_temporary_credit_amount(dispute_amount, dispute_category)
+        credit_percentage = (credit_amount / dispute_amount * 100) if dispute_amount > 0 else 0
         
         return {
             "customer_id": customer_id,
             "dispute_amount": dispute_amount,
             "dispute_category": dispute_category,
             "recommended_credit": credit_amount,
-            "credit_percentage": (credit_amount / dispute_amount * 100) if dispute_amount > 0 else 0,
-            "analysis": f"Recommended temporary credit: ${credit_amount:.2f} ({credit_amount/dispute_amount*100:.0f}% of dispute amount)"
+            "credit_percentage": credit_percentage,
+            "analysis": f"Recommended temporary credit: ${credit_amount:.2f} ({credit_percentage:.0f}% of dispute amount)"
         }
     
     async def _issue_temporary_credit(self, customer_id: str, amount: float, dispute_id: str) -> Dict[str, Any]:
@@ -531,7 +631,7 @@ class FunctionRegistry:
             "account_number": "****1234"
         }
         
-        result = await self.mock_api_service.issue_temporary_credit(credit_data)
+        result = await self._call_action("issue_temporary_credit", self.mock_api_service.issue_temporary_credit, credit_data)
         return result
     
     async def _file_dispute_with_network(self, dispute_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -547,7 +647,7 @@ class FunctionRegistry:
             "channel": channel
         }
         
-        result = await self.mock_api_service.notify_customer(notification_data)
+        result = await self._call_action("send_customer_notification", self.mock_api_service.notify_customer, notification_data)
         return result
     
     async def _update_case_management(self, dispute_id: str, status: str, notes: str) -> Dict[str, Any]:
@@ -559,5 +659,5 @@ class FunctionRegistry:
             "priority": "Normal"
         }
         
-        result = await self.mock_api_service.update_case_management(case_data)
+        result = await self._call_action("update_case_management", self.mock_api_service.update_case_management, case_data)
         return result
\ No newline at end of file
@@ -1,41 +1,67 @@
 import asyncio
-import uuid
+import random
+from secrets import token_hex
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
 import os
+from types import MappingProxyType
+
+from ..utils.helpers import generate_unique_id
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Simulated latency per operation type, in seconds
+OPERATION_DELAYS = MappingProxyType({
+    "database_query": 0.3,
+    "external_api": 1.0,
+    "file_operation": 0.5,
+    "validation": 0.2,
+    "processing": 0.8
+})
+
+ACCOUNT_STATUSES = ("Active", "Active", "Active", "Restricted", "Frozen")  # Mostly active
+
+RESOLUTION_WINDOW = timedelta(days=10)  # Network decision and credit reversal
+CASE_DUE_WINDOW = timedelta(days=5)
+LAST_TRANSACTION_OFFSETS = tuple(timedelta(days=days) for days in range(1, 8))
+
 
 class MockAPIService:
     """Service for mocking external banking APIs"""
     
     def __init__(self):
-        self.mock_delay = float(os.getenv("MOCK_API_DELAY", "1.5"))
+        # MOCK_FAST=1 drops all simulated latency, e.g. for test runs
+        self.fast = os.getenv("MOCK_FAST", "0") == "1"
+        self.mock_delay = 0.0 if self.fast else float(os.getenv("MOCK_API_DELAY", "1.5"))
+        # A nonzero MOCK_SEED makes the simulated outcomes reproducible
+        self._rng = random.Random(int(os.getenv("MOCK_SEED", "0")) or None)
+        # Account status lookups in progress, keyed by (customer, account)
+        self._account_lookups = SingleFlight()
         self.dispute_success_rate = 0.85  # 85% success rate for filing
         self.credit_success_rate = 0.95   # 95% success rate for credits
         
     async def file_dispute(self, dispute_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock dispute filing API"""
-        await asyncio.sleep(self.mock_delay)
+        await self._delay(self.mock_delay)
         
-        logger.info(f"Filing dispute for customer {dispute_data.get('customer_id')}")
+        logger.info("Filing dispute for customer %s", dispute_data.get('customer_id'))
         
         # Simulate random success/failure
-        import random
-        success = random.random() < self.dispute_success_rate
+        success = self._rng.random() < self.dispute_success_rate
         
         if success:
-            dispute_id = f"DSP{datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:6].upper()}"
+            dispute_id = generate_unique_id("DSP", 6)
+            now = datetime.now()
             
             return {
                 "success": True,
                 "dispute_id": dispute_id,
-                "reference_number": f"REF{uuid.uuid4().hex[:8].upper()}",
+                "reference_number": f"REF{token_hex(4).upper()}",
                 "status": "Filed",
-                "filed_date": datetime.now().isoformat(),
-                "estimated_resolution_date": (datetime.now() + timedelta(days=10)).isoformat(),
+                "filed_date": now.isoformat(),
+                "estimated_resolution_date": (now + RESOLUTION_WINDOW).isoformat(),
                 "message": "Dispute successfully filed with payment network"
             }
         else:
@@ -48,16 +74,23 @@ class MockAPIService:
     
     async def issue_temporary_credit(self, credit_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock temporary credit API"""
-        await asyncio.sleep(self.mock_delay * 0.5)  # Credits are faster
-        
-        logger.info(f"Issuing temporary credit of ${credit_data.get('amount')} to customer {credit_data.get('customer_id')}")
+        await self._delay(self.mock_delay * 0.5)  # Credits are faster
+        return self._temporary_credit_result(credit_data)
+    
+    async def issue_temporary_credits_bulk(self, credit_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mock bulk temporary credit API: one round-trip for several credits"""
+        await self._delay(self.mock_delay * 0.5)
+        return [self._temporary_credit_result(credit_data) for credit_data in credit_data_list]
+    
+    def _temporary_credit_result(self, credit_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info("Issuing temporary credit of $%s to customer %s", credit_data.get('amount'), credit_data.get('customer_id'))
         
         # Simulate random success/failure
-        import random
-        success = random.random() < self.credit_success_rate
+        success = self._rng.random() < self.credit_success_rate
         
         if success:
-            credit_id = f"TMP{datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:6].upper()}"
+            credit_id = generate_unique_id("TMP", 6)
+            now = datetime.now()
             
             return {
                 "success": True,
@@ -65,9 +98,9 @@ class MockAPIService:
                 "amount": credit_data.get("amount"),
                 "customer_id": credit_data.get("customer_id"),
                 "account_number": credit_data.get("account_number", "****1234"),
-                "posted_date": datetime.now().isoformat(),
+                "posted_date": now.isoformat(),
                 "description": f"Temporary credit for dispute {credit_data.get('dispute_id', 'N/A')}",
-                "reversal_date": (datetime.now() + timedelta(days=10)).isoformat(),
+                "reversal_date": (now + RESOLUTION_WINDOW).isoformat(),
                 "message": "Temporary credit successfully posted to account"
             }
         else:
@@ -79,19 +112,21 @@ class MockAPIService:
             }
     
     async def check_account_status(self, customer_id: str, account_number: str) -> Dict[str, Any]:
-        """Mock account status check API"""
-        await asyncio.sleep(self.mock_delay * 0.3)
+        """Mock account status check API; concurrent checks of one account share a lookup"""
+        return await self._account_lookups.run(
+            (customer_id, account_number), lambda: self._account_status_result(customer_id, account_number)
+        )
+    
+    async def _account_status_result(self, customer_id: str, account_number: str) -> Dict[str, Any]:
+        await self._delay(self.mock_delay * 0.3)
         
-        logger.info(f"Checking account status for customer {customer_id}")
+        logger.info("Checking account status for customer %s", customer_id)
         
         # Simulate account status check
-        import random
-        
-        statuses = ["Active", "Active", "Active", "Restricted", "Frozen"]  # Mostly active
-        account_status = random.choice(statuses)
+        account_status = self._rng.choice(ACCOUNT_STATUSES)
         
-        available_balance = random.uniform(100, 5000)
-        pending_disputes = random.randint(0, 3)
+        available_balance = self._rng.uniform(100, 5000)
+        pending_disputes = self._rng.randint(0, 3)
         
         return {
             "success": True,
@@ -100,24 +135,42 @@ class MockAPIService:
             "account_status": account_status,
             "available_balance": round(available_balance, 2),
             "pending_disputes": pending_disputes,
-            "last_transaction_date": (datetime.now() - timedelta(days=random.randint(1, 7))).isoformat(),
+            "last_transaction_date": (datetime.now() - self._rng.choice(LAST_TRANSACTION_OFFSETS)).isoformat(),
             "credit_eligible": account_status == "Active" and pending_disputes < 3,
             "dispute_eligible": account_status in ["Active", "Restricted"],
             "restrictions": [] if account_status == "Active" else ["Limited dispute filing"]
         }
     
+    async def check_fraud_flag(self, customer_id: str) -> Dict[str, Any]:
+        """Mock fraud flag lookup API"""
+        await self._delay(self.mock_delay * 0.3)
+        
+        logger.info("Checking fraud flags for customer %s", customer_id)
+        
+        return {
+            "success": True,
+            "customer_id": customer_id,
+            "fraud_flag": False
+        }
+    
     async def notify_customer(self, notification_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock customer notification API (SMS/Email)"""
-        await asyncio.sleep(self.mock_delay * 0.2)
-        
-        logger.info(f"Sending notification to customer {notification_data.get('customer_id')}")
+        await self._delay(self.mock_delay * 0.2)
+        return self._notification_result(notification_data)
+    
+    async def notify_customers_bulk(self, notification_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mock bulk customer notification API: one round-trip for several notifications"""
+        await self._delay(self.mock_delay * 0.2)
+        return [self._notification_result(notification_data) for notification_data in notification_data_list]
+    
+    def _notification_result(self, notification_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info("Sending notification to customer %s", notification_data.get('customer_id'))
         
         # Simulate notification sending
-        import random
-        success = random.random() < 0.98  # Very high success rate for notifications
+        success = self._rng.random() < 0.98  # Very high success rate for notifications
         
         if success:
-            notification_id = f"NOT{datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:4].upper()}"
+            notification_id = generate_unique_id("NOT", 4)
             
             return {
                 "success": True,
@@ -136,20 +189,28 @@ class MockAPIService:
     
     async def update_case_management(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock case management system update"""
-        await asyncio.sleep(self.mock_delay * 0.4)
-        
-        logger.info(f"Updating case management for dispute {case_data.get('dispute_id')}")
+        await self._delay(self.mock_delay * 0.4)
+        return self._case_management_result(case_data)
+    
+    async def update_case_management_bulk(self, case_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mock bulk case management update: one round-trip for several cases"""
+        await self._delay(self.mock_delay * 0.4)
+        return [self._case_management_result(case_data) for case_data in case_data_list]
+    
+    def _case_management_result(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info("Updating case management for dispute %s", case_data.get('dispute_id'))
         
-        case_id = f"CASE{datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:4].upper()}"
+        case_id = generate_unique_id("CASE", 4)
+        now = datetime.now()
         
         return {
             "success": True,
             "case_id": case_id,
             "dispute_id": case_data.get("dispute_id"),
-            "assigned_agent": f"Agent{random.randint(100, 999)}",
+            "assigned_agent": f"Agent{self._rng.randint(100, 999)}",
             "priority": case_data.get("priority", "Normal"),
-            "created_date": datetime.now().isoformat(),
-            "due_date": (datetime.now() + timedelta(days=5)).isoformat(),
+            "created_date": now.isoformat(),
+            "due_date": (now + CASE_DUE_WINDOW).isoformat(),
             "status": "Open",
             "workflow_stage": "Investigation",
             "message": "Case created and assigned successfully"
@@ -157,18 +218,16 @@ class MockAPIService:
     
     async def simulate_api_delay(self, operation_name: str) -> None:
         """Simulate realistic API delays for different operations"""
-        delays = {
-            "database_query": 0.3,
-            "external_api": 1.0,
-            "file_operation": 0.5,
-            "validation": 0.2,
-            "processing": 0.8
-        }
-        
-        delay = delays.get(operation_name, self.mock_delay)
-        await asyncio.sleep(delay)
+        delay = 0.0 if self.fast else OPERATION_DELAYS.get(operation_name, self.mock_delay)
+        await self._delay(delay)
         
-        logger.debug(f"Simulated {operation_name} delay: {delay}s")
+        logger.debug("Simulated %s delay: %ss", operation_name, delay)
+    
+    async def _delay(self, seconds: float) -> None:
+        """Sleep for a simulated latency; zero, or any delay under pytest, just yields to the event loop"""
+        if seconds <= 0 or "PYTEST_CURRENT_TEST" in os.environ:
+            seconds = 0
+        await asyncio.sleep(seconds)
 
 
 # Utility functions for common API patterns
@@ -176,18 +235,24 @@ async def validate_dispute_eligibility(customer_id: str, transaction_data: Dict[
     """Check if customer is eligible to file a dispute"""
     api_service = MockAPIService()
     
-    # Check account status
-    account_check = await api_service.check_account_status(
-        customer_id, 
-        transaction_data.get("account_number", "****1234")
+    # Independent checks run concurrently
+    account_check, fraud_check = await asyncio.gather(
+        api_service.check_account_status(
+            customer_id, 
+            transaction_data.get("account_number", "****1234")
+        ),
+        api_service.check_fraud_flag(customer_id)
     )
     
     if not account_check["success"]:
         return account_check
+    if not fraud_check["success"]:
+        return fraud_check
     
     # Additional validation logic
     eligible = (
         account_check["dispute_eligible"] and
+        not fraud_check["fraud_flag"] and
         account_check["pending_disputes"] < 5 and
         float(transaction_data.get("amount", 0)) > 1.00  # Minimum dispute amount
     )
@@ -1,103 +1,307 @@
 import asyncio
-import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
-from openai import OpenAI
+import weakref
+from typing import AsyncIterable, Dict, List, Any, Callable, Optional, Tuple
+import orjson
+from openai import AsyncOpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionMessage
 import os
-from datetime import datetime
-from ..utils.helpers import safe_json_dumps
+from ..utils.helpers import generate_unique_id, safe_json_dumps
+from .response_cache import ResponseCache
+from ._http import close_http_client, get_http_client
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Opening turns depend only on the dispute request, so a resubmitted dispute
+# can reuse the model's investigation plan for this long
+OPENING_TURN_CACHE_TTL = 3600
+
+# Context fields that change per request without changing the analysis
+VOLATILE_CONTEXT_FIELDS = ("user_id", "session_id", "timestamp", "start_time", "end_time")
+
+# Batch API job states after which no more results will arrive
+BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def _parse_arguments(arguments: str) -> Dict[str, Any]:
+    """Decode tool-call arguments, skipping the parser for tools called without any"""
+    if arguments in ("", "{}"):
+        return {}
+    return orjson.loads(arguments)
+
+
+# Clients per event loop, since they share that loop's connection pool
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+
+def _get_client(api_key: str) -> AsyncOpenAI:
+    """Return a client per API key so agents on the running loop share one connection pool"""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = AsyncOpenAI(api_key=api_key, http_client=get_http_client())
+    return client
+
 
 class OpenAIService:
     """Service for interacting with OpenAI's Chat Completions API with function calling support"""
     
     def __init__(self, api_key: Optional[str] = None):
-        api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.client = OpenAI(api_key=api_key)
-        else:
-            self.client = None  # Allow testing without API key
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._client: Optional[AsyncOpenAI] = None
         self.model = "gpt-4o-mini"
+        self._opening_turn_cache = ResponseCache(
+            ttl=OPENING_TURN_CACHE_TTL,
+            volatile_fields=VOLATILE_CONTEXT_FIELDS
+        )
+        # Tokens the opening-turn cache avoided spending, from the cached calls' usage
+        self.tokens_saved = 0
+    
+    @property
+    def client(self) -> Optional[AsyncOpenAI]:
+        """Client for the running event loop, or None without an API key to allow testing"""
+        if self._client is not None:
+            return self._client
+        return _get_client(self.api_key) if self.api_key else None
+    
+    @client.setter
+    def client(self, client: Optional[AsyncOpenAI]) -> None:
+        self._client = client
+    
+    async def close(self) -> None:
+        """Close the running loop's shared connection pool and the clients using it"""
+        _clients.pop(asyncio.get_running_loop(), None)
+        await close_http_client()
+    
+    async def warm(self) -> None:
+        """Open the pooled connection ahead of the first chat completion"""
+        if not self.client:
+            return
+        
+        # A model lookup completes the TLS handshake without spending tokens
+        try:
+            await self.client.models.retrieve(self.model)
+        except Exception as e:
+            logger.warning("Could not warm OpenAI connection: %s", e)
+    
+    async def __aenter__(self) -> "OpenAIService":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
         
     async def process_dispute_with_functions(self, dispute_request: Dict[str, Any], 
-                                           function_schemas: List[Dict]) -> Tuple[str, List[Dict], Dict]:
+                                           function_schemas: List[Dict],
+                                           on_function_call: Optional[Callable[[Dict], None]] = None) -> Tuple[str, List[Dict], Dict]:
         """Process dispute using function calling approach"""
         
         if not self.client:
             return "OpenAI client not initialized - API key required", [], {}
         
-        system_prompt = self._get_intelligent_system_prompt()
-        user_prompt = self._format_dispute_request(dispute_request)
+        cache_key = self._opening_turn_cache.make_key(self.model, dispute_request)
+        cached = self._opening_turn_cache.get(cache_key)
+        if cached is not None:
+            message, function_calls, total_tokens = cached
+            self.tokens_saved += total_tokens
+            logger.info(
+                "Opening turn cache hit: tokens_saved=%d (total %d)", total_tokens, self.tokens_saved
+            )
+            if on_function_call:
+                for function_call in function_calls:
+                    on_function_call(function_call)
+            return message.content or "I need to gather information first.", function_calls, message
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        messages = self.create_initial_messages(dispute_request)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=function_schemas,
-                tool_choice="auto",
-                temperature=0.3
+            # Usage arrives in a final chunk, so later cache hits can report the tokens they save
+            stream = await self.client.chat.completions.create(
+                **self._chat_request_body(messages, function_schemas),
+                stream=True,
+                stream_options={"include_usage": True}
             )
-            
-            message = response.choices[0].message
-            function_calls = []
-            
-            # Extract function calls if any
-            if message.tool_calls:
-                for tool_call in message.tool_calls:
-                    function_calls.append({
-                        "id": tool_call.id,
-                        "function_name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments)
-                    })
+            message, function_calls, usage = await self._collect_stream(stream, on_function_call)
+            total_tokens = usage.total_tokens if usage else 0
+            self._opening_turn_cache.set(cache_key, (message, function_calls, total_tokens))
             
             # Return the full message object for proper conversation history
             return message.content or "I need to gather information first.", function_calls, message
                 
         except Exception as e:
-            logger.error(f"Error in OpenAI dispute processing: {str(e)}")
+            logger.error("Error in OpenAI dispute processing: %s", e)
             return f"Error processing dispute: {str(e)}", [], {}
     
-    async def continue_conversation(self, messages: List[Dict], function_schemas: List[Dict]) -> Tuple[str, List[Dict], Dict]:
+    async def continue_conversation(self, messages: List[Dict], function_schemas: List[Dict],
+                                    on_function_call: Optional[Callable[[Dict], None]] = None) -> Tuple[str, List[Dict], Dict]:
         """Continue conversation with function results"""
         
         if not self.client:
             return "OpenAI client not initialized - API key required", [], {}
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=function_schemas,
-                tool_choice="auto",
-                temperature=0.3
+            stream = await self.client.chat.completions.create(
+                **self._chat_request_body(messages, function_schemas),
+                stream=True
             )
-            
-            message = response.choices[0].message
-            function_calls = []
-            
-            # Extract function calls if any
-            if message.tool_calls:
-                for tool_call in message.tool_calls:
-                    function_calls.append({
-                        "id": tool_call.id,
-                        "function_name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments)
-                    })
+            message, function_calls, _ = await self._collect_stream(stream, on_function_call)
             
             return message.content or "", function_calls, message
                 
         except Exception as e:
-            logger.error(f"Error in OpenAI conversation: {str(e)}")
+            logger.error("Error in OpenAI conversation: %s", e)
             return f"Error continuing conversation: {str(e)}", [], {}
     
+    async def submit_dispute_batch(self, dispute_requests: List[Dict[str, Any]],
+                                   function_schemas: List[Dict]) -> Optional[str]:
+        """Submit the opening turn of several disputes as one Batch API job"""
+        
+        if not self.client:
+            return None
+        
+        # custom_id is the request's position so results can be matched back
+        lines = [
+            orjson.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._chat_request_body(self.create_initial_messages(dispute_request), function_schemas)
+            })
+            for index, dispute_request in enumerate(dispute_requests)
+        ]
+        
+        batch_file = await self.client.files.create(
+            file=("disputes.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted dispute batch %s with %d requests", batch.id, len(lines))
+        return batch.id
+    
+    async def get_dispute_batch_results(self, batch_id: str) -> Optional[Dict[str, Tuple[str, List[Dict], Any]]]:
+        """Return opening turns keyed by custom_id once the batch has finished, or None while it runs"""
+        
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status not in BATCH_FINAL_STATUSES:
+            return None
+        
+        results = {}
+        if batch.output_file_id:
+            content = (await self.client.files.content(batch.output_file_id)).text
+            for line in content.splitlines():
+                if not line:
+                    continue
+                
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                
+                message = ChatCompletionMessage.model_validate(response["body"]["choices"][0]["message"])
+                results[item["custom_id"]] = (
+                    message.content or "I need to gather information first.",
+                    self._extract_function_calls(message),
+                    message
+                )
+        
+        logger.info("Dispute batch %s %s: %d usable results", batch_id, batch.status, len(results))
+        return results
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit and miss counts for the opening-turn cache, with the tokens it saved"""
+        return {**self._opening_turn_cache.stats, "tokens_saved": self.tokens_saved}
+    
+    def _chat_request_body(self, messages: List[Dict], function_schemas: List[Dict]) -> Dict[str, Any]:
+        """Build the chat completion parameters shared by online and batch requests"""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "tools": function_schemas,
+            "tool_choice": "auto",
+            "parallel_tool_calls": True,
+            "temperature": 0.3
+        }
+    
+    async def _collect_stream(self, stream: AsyncIterable[Any],
+                        on_function_call: Optional[Callable[[Dict], None]] = None) -> Tuple[ChatCompletionMessage, List[Dict], Optional[CompletionUsage]]:
+        """Assemble a streamed assistant message, reporting each function call as soon as it is complete"""
+        usage = None
+        content_parts = []
+        tool_calls = []
+        function_calls = []
+        
+        def complete_up_to(count: int) -> None:
+            while len(function_calls) < count:
+                tool_call = tool_calls[len(function_calls)]
+                function_call = {
+                    "id": tool_call["id"],
+                    "function_name": tool_call["function"]["name"],
+                    "arguments": _parse_arguments(tool_call["function"]["arguments"])
+                }
+                function_calls.append(function_call)
+                if on_function_call:
+                    on_function_call(function_call)
+        
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+            
+            for tool_call_delta in delta.tool_calls or []:
+                if tool_call_delta.index == len(tool_calls):
+                    # Tool calls stream in order, so a new one completes all earlier ones
+                    complete_up_to(len(tool_calls))
+                    tool_calls.append({
+                        "id": tool_call_delta.id,
+                        "type": "function",
+                        "function": {"name": tool_call_delta.function.name, "arguments": ""}
+                    })
+                if tool_call_delta.function and tool_call_delta.function.arguments:
+                    tool_calls[tool_call_delta.index]["function"]["arguments"] += tool_call_delta.function.arguments
+            
+            if chunk.choices[0].finish_reason:
+                # The last call is complete now; the rest of the stream is only the
+                # end marker, which is still read so the connection returns to the pool
+                complete_up_to(len(tool_calls))
+        
+        complete_up_to(len(tool_calls))
+        
+        message = ChatCompletionMessage.model_validate({
+            "role": "assistant",
+            "content": "".join(content_parts) or None,
+            "tool_calls": tool_calls or None
+        })
+        return message, function_calls, usage
+    
+    def _extract_function_calls(self, message: Any) -> List[Dict]:
+        """Extract function calls from an assistant message, if any"""
+        function_calls = []
+        if message.tool_calls:
+            for tool_call in message.tool_calls:
+                function_calls.append({
+                    "id": tool_call.id,
+                    "function_name": tool_call.function.name,
+                    "arguments": _parse_arguments(tool_call.function.arguments)
+                })
+        return function_calls
+    
+    def create_initial_messages(self, dispute_request: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Build the static system prompt and per-dispute user prompt that open a conversation"""
+        return [
+            {"role": "system", "content": self._get_intelligent_system_prompt()},
+            {"role": "user", "content": self._format_dispute_request(dispute_request)}
+        ]
+    
     def _get_intelligent_system_prompt(self) -> str:
         """Get the system prompt for intelligent dispute processing"""
         return """You are an expert dispute resolution specialist with access to comprehensive tools and data.
@@ -129,6 +333,7 @@ Your role is to analyze customer disputes intelligently and efficiently by:
 
 **Important Guidelines:**
 - Start by gathering basic transaction and account information
+- Request all independent investigations together in a single turn instead of one function per turn
 - Use your judgment on which investigations are necessary based on dispute type and amount
 - Consider merchant risk, customer history, and network rules in your decisions
 - Provide clear reasoning for your recommendations
@@ -140,33 +345,34 @@ Your role is to analyze customer disputes intelligently and efficiently by:
 - Ensure fast resolution when possible
 - Follow all compliance and policy requirements
 
-Begin by analyzing the dispute request and determining what information you need to make an informed decision."""
+Begin by analyzing the dispute request and determining what information you need to make an informed decision. Call every investigation function you need at once, then provide a resolution."""
     
     def _format_dispute_request(self, dispute_request: Dict[str, Any]) -> str:
         """Format dispute request for LLM processing"""
         
+        # Category first: disputes of the same category share a longer prefix.
+        # Session-scoped identifiers change on every request, so they go last.
         return f"""
 NEW DISPUTE REQUEST
 
-**Customer Information:**
-- Customer ID: {dispute_request.get('customer_id', 'N/A')}
-- Card Last Four Digits: {dispute_request.get('card_last_four', 'N/A')}
+**Dispute Category:** {dispute_request.get('dispute_category', 'N/A')}
 
 **Transaction Details:**
-- Amount: ${dispute_request.get('transaction_amount', 0):.2f}
 - Merchant: {dispute_request.get('merchant_name', 'N/A')}
-- Dispute Category: {dispute_request.get('dispute_category', 'N/A')}
+- Amount: ${dispute_request.get('transaction_amount', 0):.2f}
 
 **Dispute Information:**
 - Reason: {dispute_request.get('dispute_reason', 'N/A')}
 - Additional Details: {dispute_request.get('additional_details', 'None provided')}
 
+**Customer Information:**
+- Customer ID: {dispute_request.get('customer_id', 'N/A')}
+- Card Last Four Digits: {dispute_request.get('card_last_four', 'N/A')}
+
 **Context:**
 - User ID: {dispute_request.get('user_id', 'N/A')}
 - Session ID: {dispute_request.get('session_id', 'N/A')}
-
-Please analyze this dispute request and determine what information you need to gather to make an informed decision. Use the available functions to investigate as needed, then provide a resolution.
-        """
+"""
     
     # Legacy method for backward compatibility
     async def analyze_dispute_step(self, step_name: str, context: Dict[str, Any], 
@@ -185,7 +391,4 @@ Please analyze this dispute request and determine what information you need to g
     
     async def generate_dispute_id(self) -> str:
         """Generate a unique dispute ID"""
-        import uuid
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        return f"DSP{timestamp}{unique_id.upper()}"
\ No newline at end of file
+        return generate_unique_id("DSP")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class ResponseCache:
+    """Exact-match cache for LLM responses with a TTL and LFU eviction"""
+
+    def __init__(self, ttl: float = 3600.0, volatile_fields: Iterable[str] = (), maxsize: int = 1024):
+        self.ttl = ttl
+        self.volatile_fields = frozenset(volatile_fields)
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        # Hits per entry, so frequently reused prompts outlive one-off bursts
+        self._uses: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def make_key(self, namespace: str, payload: Dict[str, Any]) -> str:
+        """Build a stable key from the payload with volatile fields removed"""
+        canonical = json.dumps(self._canonicalize(payload), sort_keys=True, default=str)
+        return hashlib.sha256(f"{namespace}:{canonical}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None on a miss or expired entry"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            del self._uses[key]
+            entry = None
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        self._uses[key] += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value until the cache's TTL elapses"""
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            self._purge_expired()
+            if len(self._entries) >= self.maxsize:
+                # Evict the least used entry; min() keeps the oldest among ties
+                victim = min(self._uses, key=self._uses.__getitem__)
+                del self._entries[victim]
+                del self._uses[victim]
+
+        expires_at = time.monotonic() + self.ttl
+        self._entries[key] = (expires_at, value)
+        self._uses.setdefault(key, 0)
+
+    def _purge_expired(self) -> None:
+        # Expired entries only leave on get(), so a once-popular one would otherwise never be evicted
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+            del self._uses[key]
+
+    def _canonicalize(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                k: self._canonicalize(v) for k, v in value.items()
+                if k not in self.volatile_fields
+            }
+        if isinstance(value, (list, tuple)):
+            return [self._canonicalize(v) for v in value]
+        return value
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SharedCallAborted(Exception):
+    """The caller running a shared in-flight call was cancelled before it finished"""
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers that use the same key"""
+
+    def __init__(self):
+        # Futures belong to one event loop, so calls are only shared within a loop
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await call(), or the result of an identical call already running on this loop"""
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except SharedCallAborted:
+                # The caller running the shared call was cancelled; run it for this one instead
+                return await call()
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved in case no other caller is waiting
+            raise
+        except BaseException:
+            # Cancelling the future would cancel every waiting caller along with this one
+            future.set_exception(SharedCallAborted())
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
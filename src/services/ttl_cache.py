@@ -0,0 +1,58 @@
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    """Cache with per-entry expiry and least-recently-used eviction"""
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry and mark it recently used, or default"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def ttl_cached(ttl: float = 60.0, maxsize: int = 256):
+    """Memoize an async method per instance, keyed on its arguments"""
+    def decorator(method: Callable) -> Callable:
+        attr = f"_ttl_cache_{method.__name__}"
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache = self.__dict__.get(attr)
+            if cache is None:
+                cache = self.__dict__[attr] = AsyncTTLCache(ttl, maxsize)
+
+            key = (args, tuple(sorted(kwargs.items())))
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = await method(self, *args, **kwargs)
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
@@ -1,13 +1,42 @@
+import atexit
+import functools
 import logging
+import logging.handlers
 import os
-import json
-from datetime import datetime
-from typing import Dict, Any, Optional
-import uuid
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+from secrets import token_hex
+
+import orjson
+
+# Log record extras appended by the structured formatter, in output order
+_EXTRA_FIELDS = ("user_id", "session_id", "dispute_id", "function")
+_EXTRA_SET = frozenset(_EXTRA_FIELDS)
+
+# Background thread that writes queued log records; started by the first setup_logging() call
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_setup_lock = threading.Lock()
 
 
 def setup_logging(log_level: str = "INFO") -> None:
     """Set up application logging with structured fields"""
+    global _log_listener
+    
+    root_logger = logging.getLogger()
+    with _log_setup_lock:
+        root_logger.setLevel(getattr(logging, log_level.upper()))
+        # Later calls, e.g. one per Streamlit session, only adjust the level; restarting
+        # the listener would block on its thread and drop records queued meanwhile
+        if _log_listener is None:
+            _log_listener = _start_log_listener(root_logger)
+
+
+def _start_log_listener(root_logger: logging.Logger) -> logging.handlers.QueueListener:
+    """Route root logging through a queue to a listener thread that formats and writes records"""
     
     class StructuredFormatter(logging.Formatter):
         """Custom formatter that includes extra fields like user_id and session_id"""
@@ -16,17 +45,12 @@ def setup_logging(log_level: str = "INFO") -> None:
             # Standard formatting
             formatted = super().format(record)
             
-            # Add extra fields if they exist
-            extras = []
-            if hasattr(record, 'user_id') and record.user_id:
-                extras.append(f"user_id={record.user_id}")
-            if hasattr(record, 'session_id') and record.session_id:
-                extras.append(f"session_id={record.session_id}")
-            if hasattr(record, 'dispute_id') and record.dispute_id:
-                extras.append(f"dispute_id={record.dispute_id}")
-            if hasattr(record, 'function') and record.function:
-                extras.append(f"function={record.function}")
+            # Most records carry no extras, so skip the field scan for them
+            fields = record.__dict__
+            if not _EXTRA_SET & fields.keys():
+                return formatted
             
+            extras = [f"{key}={value}" for key in _EXTRA_FIELDS if (value := fields.get(key))]
             if extras:
                 formatted += f" [{', '.join(extras)}]"
             
@@ -39,22 +63,48 @@ def setup_logging(log_level: str = "INFO") -> None:
     )
     handler.setFormatter(formatter)
     
+    # Log calls only enqueue the record; a listener thread formats and writes it
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_log_listener)
+    
     # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, log_level.upper()))
     root_logger.handlers.clear()  # Clear existing handlers
-    root_logger.addHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Reduce noise from external libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("openai").setLevel(logging.WARNING)
+    
+    return listener
+
+
+def _stop_log_listener() -> None:
+    """Flush queued log records at interpreter exit"""
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
+_dotenv_lock = threading.Lock()
+_dotenv_loaded = False
+
 
+def _load_dotenv_once() -> None:
+    """Read the .env file at most once, even when sessions start concurrently"""
+    global _dotenv_loaded
+    with _dotenv_lock:
+        if not _dotenv_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(override=False)
+            _dotenv_loaded = True
 
-def load_environment() -> Dict[str, Any]:
-    """Load environment variables and configuration"""
+
+@functools.lru_cache(maxsize=1)
+def load_environment() -> Mapping[str, Any]:
+    """Load environment variables and configuration once; the result is read-only"""
     
-    from dotenv import load_dotenv
-    load_dotenv()
+    _load_dotenv_once()
     
     config = {
         "openai_api_key": os.getenv("OPENAI_API_KEY"),
@@ -70,7 +120,8 @@ def load_environment() -> Dict[str, Any]:
         "mock_api_delay": float(os.getenv("MOCK_API_DELAY", "1.5"))
     }
     
-    return config
+    # Read-only, since every caller shares the cached mapping
+    return MappingProxyType(config)
 
 
 def validate_config(config: Dict[str, Any]) -> bool:
@@ -90,11 +141,30 @@ def format_currency(amount: float) -> str:
     return f"${amount:,.2f}"
 
 
-def generate_unique_id(prefix: str = "") -> str:
-    """Generate a unique identifier"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    unique_part = str(uuid.uuid4())[:8].upper()
-    return f"{prefix}{timestamp}{unique_part}"
+# (epoch second, formatted timestamp) for the most recent second seen
+_timestamp_cache = (0, "")
+
+
+def compact_timestamp() -> str:
+    """Current local time as YYYYMMDDHHMMSS, formatted at most once per second"""
+    global _timestamp_cache
+    second = int(time.time())
+    if _timestamp_cache[0] != second:
+        t = time.localtime(second)
+        _timestamp_cache = (
+            second,
+            f"{t.tm_year}{t.tm_mon:02d}{t.tm_mday:02d}{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}"
+        )
+    return _timestamp_cache[1]
+
+
+def generate_unique_id(prefix: str = "", random_chars: int = 8) -> str:
+    """Generate a unique identifier from a timestamp and random hex characters"""
+    return f"{prefix}{compact_timestamp()}{token_hex(random_chars // 2).upper()}"
+
+
+# ASCII control characters other than tab, newline and carriage return
+_CONTROL_CHARS = dict.fromkeys([*range(0, 9), 11, 12, *range(14, 32)])
 
 
 def sanitize_input(text: str, max_length: int = 1000) -> str:
@@ -103,7 +173,8 @@ def sanitize_input(text: str, max_length: int = 1000) -> str:
         return ""
     
     # Remove potential harmful content
-    sanitized = str(text).strip()
+    sanitized = text if type(text) is str else str(text)
+    sanitized = sanitized.translate(_CONTROL_CHARS).strip()
     
     # Limit length
     if len(sanitized) > max_length:
@@ -120,9 +191,12 @@ def calculate_processing_time(start_time: datetime, end_time: Optional[datetime]
     return (end_time - start_time).total_seconds()
 
 
+DISPLAY_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
 def format_datetime(dt: datetime) -> str:
     """Format datetime for display"""
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
+    return dt.strftime(DISPLAY_DATETIME_FORMAT)
 
 
 def mask_sensitive_data(data: str, visible_chars: int = 4) -> str:
@@ -130,7 +204,8 @@ def mask_sensitive_data(data: str, visible_chars: int = 4) -> str:
     if len(data) <= visible_chars:
         return "*" * len(data)
     
-    return "*" * (len(data) - visible_chars) + data[-visible_chars:]
+    # Pad the visible tail with stars in a single call
+    return data[len(data) - visible_chars:].rjust(len(data), "*")
 
 
 class ProcessingTimer:
@@ -139,15 +214,17 @@ class ProcessingTimer:
     def __init__(self, operation_name: str):
         self.operation_name = operation_name
         self.start_time = None
-        self.end_time = None
+        self._start_perf = None
+        self._duration = None
         
     def __enter__(self):
         self.start_time = datetime.now()
+        self._start_perf = time.perf_counter()
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end_time = datetime.now()
-        duration = calculate_processing_time(self.start_time, self.end_time)
+        # Monotonic clock, so wall-clock adjustments cannot skew the duration
+        self._duration = duration = time.perf_counter() - self._start_perf
         
         logger = logging.getLogger(__name__)
         if exc_type:
@@ -155,11 +232,15 @@ class ProcessingTimer:
         else:
             logger.info(f"{self.operation_name} completed in {duration:.2f}s")
     
+    @property
+    def end_time(self) -> Optional[datetime]:
+        if self._duration is None:
+            return None
+        return self.start_time + timedelta(seconds=self._duration)
+    
     @property
     def duration(self) -> float:
-        if self.start_time and self.end_time:
-            return calculate_processing_time(self.start_time, self.end_time)
-        return 0.0
+        return self._duration or 0.0
 
 
 def create_error_response(error_message: str, error_code: str = "GENERAL_ERROR") -> Dict[str, Any]:
@@ -187,7 +268,11 @@ def create_success_response(data: Any, message: str = "Operation successful") ->
 def safe_json_dumps(obj: Any) -> str:
     """Safely serialize object to JSON"""
     try:
-        return json.dumps(obj, default=str, indent=2)
+        # Numpy values from the pandas data layer serialize as numbers, not via str()
+        return orjson.dumps(
+            obj, default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
     except Exception as e:
         logging.getLogger(__name__).error(f"JSON serialization error: {e}")
         return str(obj)
@@ -215,16 +300,18 @@ UI_COLORS = {
 }
 
 
+# Display color per lowercase status
+STATUS_COLORS: Mapping[str, str] = MappingProxyType({
+    "completed": UI_COLORS["success"],
+    "processing": UI_COLORS["warning"],
+    "pending": UI_COLORS["secondary"],
+    "failed": UI_COLORS["danger"],
+    "filed": UI_COLORS["success"],
+    "denied": UI_COLORS["danger"],
+    "approved": UI_COLORS["success"]
+})
+
+
 def get_status_color(status: str) -> str:
     """Get color for status display"""
-    status_colors = {
-        "completed": UI_COLORS["success"],
-        "processing": UI_COLORS["warning"],
-        "pending": UI_COLORS["secondary"],
-        "failed": UI_COLORS["danger"],
-        "filed": UI_COLORS["success"],
-        "denied": UI_COLORS["danger"],
-        "approved": UI_COLORS["success"]
-    }
-    
-    return status_colors.get(status.lower(), UI_COLORS["text_secondary"])
\ No newline at end of file
+    return STATUS_COLORS.get(status.lower(), UI_COLORS["text_secondary"])
\ No newline at end of file
@@ -1,21 +1,31 @@
 import streamlit as st
 import asyncio
-import json
+import logging
 import time
-import uuid
 import os
+import weakref
+from secrets import token_hex
 from datetime import datetime
 from typing import Dict, Any, Optional
+import orjson
 import pandas as pd
 
 # Import our modules
 from src.models import DisputeRequest, DisputeCategory
 from src.agents.intelligent_dispute_agent import IntelligentDisputeAgent
+from src.services.openai_service import OpenAIService
 from src.utils.helpers import (
     setup_logging, load_environment, validate_config,
     format_currency, mask_sensitive_data, get_status_color, UI_COLORS
 )
 
+# Use uvloop for the per-session event loops below when it is installed
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:  # uvloop is not available on Windows
+    pass
+
 # Page configuration
 st.set_page_config(
     page_title="banking-dispute-assistant-v1",
@@ -138,6 +148,19 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+def close_session_loop(loop: asyncio.AbstractEventLoop, openai_service: OpenAIService) -> None:
+    """Close a session's HTTP connection pool, then its event loop"""
+    if loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(openai_service.close())
+    except Exception as e:
+        # Finalizers can run while another session's loop is running in this thread
+        logging.getLogger(__name__).warning("Could not close session connection pool: %s", e)
+    finally:
+        loop.close()
+
+
 def initialize_app():
     """Initialize the application"""
     if 'initialized' not in st.session_state:
@@ -152,6 +175,13 @@ def initialize_app():
             validate_config(config)
             st.session_state.config = config
             st.session_state.agent = IntelligentDisputeAgent(config.get('openai_api_key'))
+            # One loop per session, so its HTTP connection pool stays warm
+            # across disputes; it is closed when the session's agent is freed
+            st.session_state.event_loop = asyncio.new_event_loop()
+            weakref.finalize(
+                st.session_state.agent, close_session_loop,
+                st.session_state.event_loop, st.session_state.agent.openai_service
+            )
             st.session_state.initialized = True
         except ValueError as e:
             st.error(f"Configuration error: {e}")
@@ -172,8 +202,7 @@ def load_users() -> pd.DataFrame:
 def generate_session_id(user_id: str) -> str:
     """Generate a unique session ID for the user"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    return f"{user_id}_{timestamp}_{unique_id}"
+    return f"{user_id}_{timestamp}_{token_hex(4)}"
 
 
 def render_user_selection():
@@ -346,7 +375,7 @@ def render_processing_status():
         progress_container = st.container()
         
         # Process the dispute
-        dispute_response = asyncio.run(
+        dispute_response = st.session_state.event_loop.run_until_complete(
             st.session_state.agent.process_dispute(st.session_state.dispute_request)
         )
         
@@ -355,32 +384,44 @@ def render_processing_status():
         st.rerun()
 
 
+# Demo lane progress; static, so its HTML is built once
+DEMO_LANES = (
+    {"name": "Past Disputes Analysis", "status": "completed", "confidence": 0.85},
+    {"name": "Merchant Risk Assessment", "status": "completed", "confidence": 0.78},
+    {"name": "Network Rules Check", "status": "completed", "confidence": 0.92}
+)
+
+LANE_TEMPLATE = """<div class="progress-lane" style="flex: 1; margin: 0.5rem 0.25rem;">
+<div style="flex: 1;">
+<div style="font-weight: 600; margin-bottom: 0.25rem;">{name}</div>
+<div class="status-indicator status-{status}">{status_title}</div>
+<div style="margin-top: 0.5rem; font-size: 0.875rem; color: #6D6D70;">Confidence: {confidence:.1%}</div>
+</div>
+</div>"""
+
+LANE_PROGRESS_HTML = '<div style="display: flex;">' + "".join(
+    LANE_TEMPLATE.format(status_title=lane["status"].title(), **lane) for lane in DEMO_LANES
+) + '</div>'
+
+
 def render_lane_progress():
     """Render parallel lane processing progress"""
     st.markdown('<div class="section-header">🔄 Parallel Analysis Lanes</div>', unsafe_allow_html=True)
-    
-    # Simulate lane progress for demo
-    lanes = [
-        {"name": "Past Disputes Analysis", "status": "completed", "confidence": 0.85},
-        {"name": "Merchant Risk Assessment", "status": "completed", "confidence": 0.78},
-        {"name": "Network Rules Check", "status": "completed", "confidence": 0.92}
-    ]
-    
-    cols = st.columns(3)
-    
-    for i, lane in enumerate(lanes):
-        with cols[i]:
-            st.markdown(f"""
-            <div class="progress-lane">
-                <div style="flex: 1;">
-                    <div style="font-weight: 600; margin-bottom: 0.25rem;">{lane['name']}</div>
-                    <div class="status-indicator status-{lane['status']}">{lane['status'].title()}</div>
-                    <div style="margin-top: 0.5rem; font-size: 0.875rem; color: #6D6D70;">
-                        Confidence: {lane['confidence']:.1%}
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(LANE_PROGRESS_HTML, unsafe_allow_html=True)
+
+
+def processing_steps_table(processing_steps) -> pd.DataFrame:
+    """One row per processing step for display"""
+    return pd.DataFrame([
+        {
+            "Step": step.step_name.replace('_', ' ').title(),
+            "Status": step.status,
+            "Confidence": step.confidence,
+            "Duration (s)": step.duration or 0.0,
+            "Reasoning": step.reasoning or ""
+        }
+        for step in processing_steps
+    ])
 
 
 def render_agent_reasoning():
@@ -404,29 +445,14 @@ def render_agent_reasoning():
         st.markdown('<div class="dispute-card">', unsafe_allow_html=True)
         
         if response.processing_steps:
-            for i, step in enumerate(response.processing_steps):
-                col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
-                
-                with col1:
-                    st.write(f"**{step.step_name.replace('_', ' ').title()}**")
-                
-                with col2:
-                    status_class = f"status-{step.status}"
-                    st.markdown(f'<div class="status-indicator {status_class}">{step.status}</div>', 
-                              unsafe_allow_html=True)
-                
-                with col3:
-                    st.write(f"{step.confidence:.1%}")
-                
-                with col4:
-                    if step.duration:
-                        st.write(f"{step.duration:.1f}s")
-                
-                if step.reasoning:
-                    st.caption(step.reasoning)
-                
-                if i < len(response.processing_steps) - 1:
-                    st.markdown("---")
+            # One table element instead of several widgets per step
+            styled_steps = processing_steps_table(response.processing_steps).style.format(
+                {"Confidence": "{:.1%}", "Duration (s)": "{:.1f}"}
+            ).map(
+                lambda status: f"background-color: {get_status_color(status)}; color: white",
+                subset=["Status"]
+            )
+            st.dataframe(styled_steps, use_container_width=True, hide_index=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -579,7 +605,7 @@ def render_sidebar():
         
         if st.button("🔄 Reset Session"):
             for key in list(st.session_state.keys()):
-                if key not in ['initialized', 'config', 'agent']:
+                if key not in ['initialized', 'config', 'agent', 'event_loop']:
                     del st.session_state[key]
             st.rerun()
         
@@ -598,7 +624,7 @@ def render_sidebar():
                 
                 st.download_button(
                     label="Download JSON Report",
-                    data=json.dumps(report_data, indent=2),
+                    data=orjson.dumps(report_data, option=orjson.OPT_INDENT_2),
                     file_name=f"dispute_report_{report_data['dispute_id']}.json",
                     mime="application/json"
                 )
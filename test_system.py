@@ -4,7 +4,6 @@ Test script for banking-dispute-assistant-v1
 """
 
 import sys
-import os
 import asyncio
 from pathlib import Path
 
@@ -13,9 +12,17 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from src.models import DisputeRequest, DisputeCategory
-from src.services.data_service import DataService
+from src.services.data_service import get_data_service
 from src.utils.helpers import setup_logging, load_environment
 
+DATA_FILES = (
+    "data/transactions.csv",
+    "data/past_disputes.csv",
+    "data/merchant_risk.csv",
+    "data/network_rules.csv",
+    "data/dispute_policies.csv"
+)
+
 
 async def test_basic_functionality():
     """Test basic functionality without OpenAI"""
@@ -26,7 +33,7 @@ async def test_basic_functionality():
     
     # Test data service
     print("\n📊 Testing Data Service...")
-    data_service = DataService()
+    data_service = get_data_service()
     
     # Test loading data
     try:
@@ -81,69 +88,95 @@ async def test_basic_functionality():
 
 async def test_mock_apis():
     """Test mock API services"""
-    print("\n🔧 Testing Mock API Services...")
-    
     try:
         from src.services.mock_api_service import MockAPIService
         
         api_service = MockAPIService()
         
-        # Test dispute filing
-        dispute_result = await api_service.file_dispute({
-            "customer_id": "CUST1234",
-            "transaction_amount": 100.00,
-            "merchant_name": "Test Merchant"
-        })
-        
-        print(f"✅ Dispute filing test: {dispute_result.get('success', False)}")
-        
-        # Test temporary credit
-        credit_result = await api_service.issue_temporary_credit({
-            "customer_id": "CUST1234",
-            "amount": 50.00,
-            "dispute_id": "DSP123456"
-        })
-        
-        print(f"✅ Temporary credit test: {credit_result.get('success', False)}")
-        
-        # Test account status
-        account_result = await api_service.check_account_status("CUST1234", "****1234")
-        print(f"✅ Account status test: {account_result.get('success', False)}")
+        # The calls are independent, so their simulated latencies overlap
+        dispute_result, credit_result, account_result = await asyncio.gather(
+            api_service.file_dispute({
+                "customer_id": "CUST1234",
+                "transaction_amount": 100.00,
+                "merchant_name": "Test Merchant"
+            }),
+            api_service.issue_temporary_credit({
+                "customer_id": "CUST1234",
+                "amount": 50.00,
+                "dispute_id": "DSP123456"
+            }),
+            api_service.check_account_status("CUST1234", "****1234"),
+            return_exceptions=True
+        )
         
     except Exception as e:
-        print(f"❌ Mock API error: {e}")
+        setup_error = e
+    else:
+        setup_error = None
+    
+    # Report once all calls are in, so the block isn't split by other phases' output
+    print("\n🔧 Testing Mock API Services...")
+    if setup_error is not None:
+        print(f"❌ Mock API error: {setup_error}")
+        return False
+    
+    checks = (
+        ("Dispute filing", dispute_result),
+        ("Temporary credit", credit_result),
+        ("Account status", account_result)
+    )
+    failed = False
+    for name, result in checks:
+        if isinstance(result, Exception):
+            print(f"❌ {name} test error: {result}")
+            failed = True
+        else:
+            print(f"✅ {name} test: {result.get('success', False)}")
+    
+    if failed:
         return False
     
     print("✅ Mock API tests completed")
     return True
 
 
-def test_data_files():
+def _count_rows(file_path):
+    """Count data rows by scanning for newlines in 1 MiB blocks, without parsing"""
+    lines = 0
+    last = b""
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last = chunk
+    
+    # A final line without a trailing newline still counts; the header does not
+    if last and not last.endswith(b"\n"):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _check_data_file(file_path):
+    """Check one data file, returning (path, ok, message)"""
+    # Opening directly reports a missing file without a separate stat() first
+    try:
+        return file_path, True, f"{_count_rows(file_path)} rows"
+    except FileNotFoundError:
+        return file_path, False, "File not found"
+    except Exception as e:
+        return file_path, False, f"Error reading - {e}"
+
+
+async def test_data_files():
     """Test that all data files are present and readable"""
-    print("\n📂 Testing Data Files...")
+    # Files are checked in worker threads so their disk reads overlap
+    results = await asyncio.gather(*(asyncio.to_thread(_check_data_file, p) for p in DATA_FILES))
     
-    data_files = [
-        "data/transactions.csv",
-        "data/past_disputes.csv", 
-        "data/merchant_risk.csv",
-        "data/network_rules.csv",
-        "data/dispute_policies.csv"
-    ]
-    
-    for file_path in data_files:
-        if os.path.exists(file_path):
-            try:
-                import pandas as pd
-                df = pd.read_csv(file_path)
-                print(f"✅ {file_path}: {len(df)} rows")
-            except Exception as e:
-                print(f"❌ {file_path}: Error reading - {e}")
-                return False
-        else:
-            print(f"❌ {file_path}: File not found")
-            return False
+    # Report once all files are in, so the block isn't split by other phases' output
+    print("\n📂 Testing Data Files...")
+    for file_path, ok, message in results:
+        print(f"{'✅' if ok else '❌'} {file_path}: {message}")
     
-    return True
+    return all(ok for _, ok, _ in results)
 
 
 async def main():
@@ -151,18 +184,20 @@ async def main():
     print("🚀 banking-dispute-assistant-v1 - System Test")
     print("=" * 50)
     
-    # Test data files first
-    if not test_data_files():
+    # The phases are independent, so data file reads and mock API waits overlap
+    files_ok, basic_ok, api_ok = await asyncio.gather(
+        test_data_files(), test_basic_functionality(), test_mock_apis()
+    )
+    
+    if not files_ok:
         print("\n❌ Data file tests failed")
         return 1
     
-    # Test basic functionality
-    if not await test_basic_functionality():
+    if not basic_ok:
         print("\n❌ Basic functionality tests failed")
         return 1
     
-    # Test mock APIs
-    if not await test_mock_apis():
+    if not api_ok:
         print("\n❌ Mock API tests failed")
         return 1
     
@@ -177,5 +212,12 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Run on uvloop like the app does, when it is installed
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:  # uvloop is not available on Windows
+        pass
+    
     exit_code = asyncio.run(main())
     sys.exit(exit_code)
\ No newline at end of file